@@ -0,0 +1,126 @@
+# Benchmark de recursos do broker: uma fila durável por usuário versus NOTIFICATION_SHARDS
+# streams compartilhados (ver src/rabbitmq/routing.py). Para cada modo declara as filas,
+# publica uma mensagem por usuário e lê da API de management o número de filas, a memória
+# do nó e a memória das filas. Usa um exchange próprio (bench.notifications) e apaga tudo no fim.
+#
+# Uso (a partir de agendamento_service/, com as variáveis RABBITMQ_* do docker-compose):
+#   python benchmarks/bench_notification_routing.py --usuarios 20000 --shards 16
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+sys.path.append(os.getcwd())
+
+import pika
+from src.config import Config
+from src.rabbitmq.connection import get_connection
+from src.rabbitmq.routing import shard_of
+
+EXCHANGE = "bench.notifications"
+CORPO = json.dumps({
+    "user_id": 0,
+    "agendamento_id": 0,
+    "novo_status": "CONFIRMADO",
+    "mensagem": "Sua consulta para o dia 2030-01-01 às 8h teve o status atualizado para CONFIRMADO",
+    "origem": "AGENDAMENTO",
+    "timestamp": "2030-01-01T00:00:00+00:00"
+}).encode()
+
+def management(caminho):
+    credenciais = base64.b64encode(f"{Config.RABBITMQ_USER}:{Config.RABBITMQ_PASSWORD}".encode()).decode()
+    request = urllib.request.Request(
+        f"{Config.RABBITMQ_MANAGEMENT_URL}/api/{caminho}",
+        headers={"Authorization": f"Basic {credenciais}"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+def medir_broker(prefixo):
+    vhost = urllib.parse.quote(Config.RABBITMQ_VHOST, safe="")
+    filas = [f for f in management(f"queues/{vhost}?columns=name,memory") if f["name"].startswith(prefixo)]
+    memoria_no = sum(no.get("mem_used", 0) for no in management("nodes"))
+
+    return {
+        "filas": len(filas),
+        "memoria_filas_mb": sum(f.get("memory", 0) for f in filas) / 2**20,
+        "memoria_no_mb": memoria_no / 2**20,
+    }
+
+def executar(channel, usuarios, destino):
+    # destino(user_id) -> (fila, routing_key, argumentos)
+    declaradas = set()
+
+    inicio = time.perf_counter()
+    for user_id in range(1, usuarios + 1):
+        fila, routing_key, arguments = destino(user_id)
+
+        if fila not in declaradas:
+            channel.queue_declare(queue=fila, durable=True, arguments=arguments)
+            channel.queue_bind(queue=fila, exchange=EXCHANGE, routing_key=routing_key)
+            declaradas.add(fila)
+    declaracao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for user_id in range(1, usuarios + 1):
+        _, routing_key, _ = destino(user_id)
+        channel.basic_publish(
+            exchange=EXCHANGE,
+            routing_key=routing_key,
+            body=CORPO,
+            properties=pika.BasicProperties(delivery_mode=2, headers={"user_id": user_id})
+        )
+    publicacao = time.perf_counter() - inicio
+
+    return declaradas, declaracao, publicacao
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de filas por usuário versus shards")
+    parser.add_argument("--usuarios", type=int, default=20000)
+    parser.add_argument("--shards", type=int, default=Config.NOTIFICATION_SHARDS)
+    parser.add_argument("--espera", type=float, default=5, help="Segundos até as métricas do management atualizarem")
+    args = parser.parse_args()
+
+    connection = get_connection()
+    channel = connection.channel()
+    channel.exchange_declare(exchange=EXCHANGE, exchange_type="direct", durable=False, auto_delete=False)
+    channel.confirm_delivery()
+
+    modos = [
+        ("fila por usuário", "bench.user.", lambda u: (f"bench.user.{u}", str(u), None)),
+        ("shards (stream)", "bench.shard.", lambda u: (
+            f"bench.shard.{shard_of(u, args.shards)}",
+            f"shard.{shard_of(u, args.shards)}",
+            {"x-queue-type": "stream", "x-max-age": "1h"}
+        )),
+    ]
+
+    base = medir_broker("bench.")
+    print(f"Base: nó {base['memoria_no_mb']:.1f} MB\n")
+
+    try:
+        for nome, prefixo, destino in modos:
+            declaradas, declaracao, publicacao = executar(channel, args.usuarios, destino)
+            time.sleep(args.espera)
+            medida = medir_broker(prefixo)
+
+            print(nome)
+            print(f"  filas: {medida['filas']}")
+            print(f"  declare + bind: {declaracao:.2f} s")
+            print(f"  publicação de {args.usuarios} mensagens com confirm: {publicacao:.2f} s")
+            print(f"  memória das filas: {medida['memoria_filas_mb']:.1f} MB")
+            print(f"  memória do nó: {medida['memoria_no_mb']:.1f} MB (base {base['memoria_no_mb']:.1f} MB)\n")
+
+            for fila in declaradas:
+                channel.queue_delete(queue=fila)
+
+    finally:
+        channel.exchange_delete(exchange=EXCHANGE)
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Micro-benchmark: custo por chamada de get_by_id e list_by_medico com SQL enviado e planejado
+# a cada chamada versus statements preparados (PREPARE uma vez + EXECUTE).
+#
+# Uso (a partir de agendamento_service/, com as variáveis DB_* e demais do docker-compose):
+#   python benchmarks/bench_prepared_statements.py --agendamento-id 1 --medico-id 2 --iteracoes 5000
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from src.database.connection import get_connection
+from src.database.statements import execute_prepared
+from src.repository.agendamento_repository import STATEMENTS
+
+def medir(nome, iteracoes, chamada):
+    chamada() # Aquecimento (inclui o PREPARE no caso preparado).
+
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        chamada()
+    total = time.perf_counter() - inicio
+
+    print(f"{nome:<32} {total / iteracoes * 1e6:10.1f} µs/chamada")
+    return total / iteracoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de statements preparados")
+    parser.add_argument("--agendamento-id", type=int, required=True)
+    parser.add_argument("--medico-id", type=int, required=True)
+    parser.add_argument("--iteracoes", type=int, default=5000)
+    args = parser.parse_args()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    def sql_simples(nome, params):
+        # Mesmo texto do statement, com os $n trocados por placeholders do psycopg2 e sem PREPARE.
+        query = re.sub(r"\$(\d+)", r"%(p\1)s", STATEMENTS[nome])
+        cursor.execute(query, {f"p{i}": valor for i, valor in enumerate(params, 1)})
+        cursor.fetchall()
+        conn.rollback()
+
+    def preparado(nome, params):
+        execute_prepared(cursor, STATEMENTS, nome, params)
+        cursor.fetchall()
+        conn.rollback()
+
+    casos = [
+        ("agendamento_get_by_id", (args.agendamento_id,)),
+        ("agendamento_list_by_medico", (args.medico_id, None)),
+        ("agendamento_list_by_medico", (args.medico_id, "CONFIRMADO")),
+    ]
+
+    for nome, params in casos:
+        print(f"\n{nome} {params}")
+        simples = medir("  SQL enviado a cada chamada", args.iteracoes, lambda: sql_simples(nome, params))
+        prep = medir("  statement preparado", args.iteracoes, lambda: preparado(nome, params))
+        print(f"  economia: {(simples - prep) * 1e6:.1f} µs/chamada ({(1 - prep / simples) * 100:.1f}%)")
+
+    cursor.close()
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import threading
+from collections import Counter
+from datetime import timedelta
+
+class AppointmentStats:
+    # Contadores de agendamentos por status, médico, especialidade e dia. Carregados uma vez
+    # com um GROUP BY na subida e mantidos a cada create/update_status feito pelo serviço,
+    # então a consulta não toca a tabela agendamento.
+    DIMENSOES = ("medico", "especialidade", "dia")
+
+    def __init__(self):
+        self._por_status = Counter()
+        self._grupos = {dimensao: {} for dimensao in self.DIMENSOES} # dimensao -> chave -> Counter(status)
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def seed(self, rows):
+        # rows: (medico_id, especialidade, data, status, total).
+        por_status = Counter()
+        grupos = {dimensao: {} for dimensao in self.DIMENSOES}
+
+        for medico_id, especialidade, data, status, total in rows:
+            por_status[status] += total
+
+            for dimensao, chave in zip(self.DIMENSOES, (medico_id, especialidade, data)):
+                grupos[dimensao].setdefault(self._chave(chave), Counter())[status] += total
+
+        with self._lock:
+            self._por_status = por_status
+            self._grupos = grupos
+            self.ready = True
+
+    def record_create(self, medico_id, especialidade, data, status):
+        with self._lock:
+            self._add(medico_id, especialidade, data, status, 1)
+
+    def record_status_change(self, medico_id, especialidade, data, status_anterior, status):
+        with self._lock:
+            self._add(medico_id, especialidade, data, status_anterior, -1)
+            self._add(medico_id, especialidade, data, status, 1)
+
+    def snapshot(self, dia_inicio=None, dia_fim=None):
+        # Por padrão só os totais (status, médico, especialidade), de tamanho fixo para a
+        # clínica. O detalhe por dia cresce com o histórico, então só sai para o intervalo
+        # [dia_inicio, dia_fim] (datas), percorrendo os dias pedidos e não a tabela inteira.
+        with self._lock:
+            resposta = {
+                "total": sum(self._por_status.values()),
+                "por_status": dict(self._por_status),
+                **{
+                    f"por_{dimensao}": {chave: dict(contagem) for chave, contagem in self._grupos[dimensao].items()}
+                    for dimensao in ("medico", "especialidade")
+                }
+            }
+
+            if dia_inicio is not None:
+                por_dia = self._grupos["dia"]
+                dias = (dia_inicio + timedelta(days=n) for n in range((dia_fim - dia_inicio).days + 1))
+
+                resposta["por_dia"] = {
+                    chave: dict(por_dia[chave])
+                    for chave in map(self._chave, dias) if chave in por_dia
+                }
+
+            return resposta
+
+    def _add(self, medico_id, especialidade, data, status, delta):
+        # Só contadores zerados são removidos: um valor negativo indica divergência com o
+        # banco e fica visível em vez de sumir.
+        self._por_status[status] += delta
+        if self._por_status[status] == 0:
+            del self._por_status[status]
+
+        for dimensao, chave in zip(self.DIMENSOES, (medico_id, especialidade, data)):
+            grupo = self._grupos[dimensao]
+            chave = self._chave(chave)
+            contagem = grupo.setdefault(chave, Counter())
+
+            contagem[status] += delta
+            if contagem[status] == 0:
+                del contagem[status]
+            if not contagem:
+                del grupo[chave]
+
+    def _chave(self, valor):
+        # Chaves de struct XML-RPC precisam ser strings.
+        return str(valor)
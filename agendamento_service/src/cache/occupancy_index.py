@@ -0,0 +1,169 @@
+import json
+import threading
+from datetime import date
+
+from src.config import Config
+from src.database.listener import PgListener
+
+class OccupancyIndex:
+    # Bitmaps de ocupação por (médico, dia) e (paciente, dia): bit (horario - horario_inicio)
+    # ligado = horário ocupado. Serve só para recusar conflitos óbvios sem ir ao banco;
+    # as constraints únicas continuam sendo a palavra final.
+    def __init__(self, horario_inicio, horario_fim):
+        self.horario_inicio = horario_inicio
+        self.horario_fim = horario_fim
+
+        self._medicos = {} # (medico_id, dia ordinal) -> bitmap
+        self._pacientes = {} # (paciente_id, dia ordinal) -> bitmap
+        self._lock = threading.Lock()
+        self.ready = False
+
+        self._stats = {"consultas": 0, "conflitos": 0, "eventos": 0, "recargas": 0}
+
+    def rebuild(self, rows):
+        # rows: (medico_id, paciente_id, data, horario). Troca o índice inteiro de uma vez.
+        medicos = {}
+        pacientes = {}
+
+        for medico_id, paciente_id, data, horario in rows:
+            bit = self._bit(horario)
+            if bit is None:
+                continue
+
+            dia = data.toordinal()
+            medicos[(medico_id, dia)] = medicos.get((medico_id, dia), 0) | bit
+            pacientes[(paciente_id, dia)] = pacientes.get((paciente_id, dia), 0) | bit
+
+        with self._lock:
+            self._medicos = medicos
+            self._pacientes = pacientes
+            self.ready = True
+            self._stats["recargas"] += 1
+
+    def invalidate(self):
+        # Sem garantia de estar atualizado (ex.: LISTEN perdido), o índice deixa de responder.
+        with self._lock:
+            self.ready = False
+
+    def apply(self, ocupado, medico_id, paciente_id, data, horario):
+        bit = self._bit(horario)
+        if bit is None:
+            return
+
+        dia = self._ordinal(data)
+
+        with self._lock:
+            self._stats["eventos"] += 1
+            self._set(self._medicos, (int(medico_id), dia), bit, ocupado)
+            self._set(self._pacientes, (int(paciente_id), dia), bit, ocupado)
+
+    def conflito(self, medico_id, paciente_id, data, horario):
+        # Retorna "medico", "paciente" ou None (livre ou índice indisponível).
+        bit = self._bit(horario)
+        if bit is None:
+            return None
+
+        dia = self._ordinal(data)
+
+        with self._lock:
+            if not self.ready:
+                return None
+
+            self._stats["consultas"] += 1
+
+            if self._medicos.get((int(medico_id), dia), 0) & bit:
+                self._stats["conflitos"] += 1
+                return "medico"
+
+            if self._pacientes.get((int(paciente_id), dia), 0) & bit:
+                self._stats["conflitos"] += 1
+                return "paciente"
+
+        return None
+
+    def prune(self, antes_de):
+        # Dias passados não recebem mais agendamentos.
+        limite = antes_de.toordinal()
+
+        with self._lock:
+            self._medicos = {k: v for k, v in self._medicos.items() if k[1] >= limite}
+            self._pacientes = {k: v for k, v in self._pacientes.items() if k[1] >= limite}
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "pronto": self.ready,
+                "dias_medico": len(self._medicos),
+                "dias_paciente": len(self._pacientes),
+            }
+
+    def _set(self, bitmaps, key, bit, ocupado):
+        valor = bitmaps.get(key, 0)
+        valor = valor | bit if ocupado else valor & ~bit
+
+        if valor:
+            bitmaps[key] = valor
+        else:
+            bitmaps.pop(key, None)
+
+    def _bit(self, horario):
+        horario = int(horario)
+        if not (self.horario_inicio <= horario <= self.horario_fim):
+            return None
+        return 1 << (horario - self.horario_inicio)
+
+    def _ordinal(self, data):
+        if isinstance(data, str):
+            data = date.fromisoformat(data)
+        return data.toordinal()
+
+class OccupancySync:
+    # Aquece o OccupancyIndex a partir da tabela agendamento e o mantém atualizado com os
+    # eventos do trigger trg_agendamento_ocupacao (LISTEN/NOTIFY).
+    def __init__(self, index, repository):
+        self.index = index
+        self.repository = repository
+        self._listener = PgListener(Config.OCCUPANCY_CHANNEL)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="occupancy-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(Config.OCCUPANCY_POLL_INTERVAL * 2)
+
+    def _run(self):
+        ultimo_prune = None
+
+        while not self._stop.is_set():
+            try:
+                # LISTEN antes da carga: eventos concorrentes à carga são reaplicados depois
+                # (aplicar um evento é idempotente), então nada se perde.
+                if self._listener.connect():
+                    self.index.rebuild(self.repository.list_occupied_slots(date.today()))
+
+                for payload in self._listener.wait(Config.OCCUPANCY_POLL_INTERVAL):
+                    evento = json.loads(payload)
+                    self.index.apply(
+                        evento["op"] == "I",
+                        evento["medico_id"],
+                        evento["paciente_id"],
+                        evento["data"],
+                        evento["horario"]
+                    )
+
+                if ultimo_prune != date.today():
+                    ultimo_prune = date.today()
+                    self.index.prune(ultimo_prune)
+
+            except Exception:
+                self.index.invalidate()
+                self._listener.close()
+                self._stop.wait(Config.OCCUPANCY_POLL_INTERVAL)
+
+        self._listener.close()
@@ -0,0 +1,98 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    # Cache read-through de listas de agendamentos por (tipo, user_id, consulta), com LRU
+    # limitado pelo total de linhas guardadas. "consulta" identifica a variante da listagem
+    # (status, formato...). Escritas invalidam todas as variantes do usuário.
+    def __init__(self, max_rows, ttl):
+        self.max_rows = max_rows
+        self.ttl = ttl
+
+        self._entries = OrderedDict() # (tipo, user_id, consulta) -> (linhas, expira_em)
+        self._por_usuario = {} # (tipo, user_id) -> {consulta}
+        self._rows = 0
+        self._lock = threading.Lock()
+
+        # Cargas em andamento; uma invalidação durante a carga impede que o resultado
+        # (possivelmente anterior à escrita) seja guardado.
+        self._tokens = itertools.count()
+        self._carregando = {} # token -> (tipo, user_id)
+        self._obsoletos = set()
+
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get_or_load(self, tipo, user_id, consulta, loader):
+        key = (tipo, int(user_id), consulta)
+        usuario = key[:2]
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+
+            if entry is not None:
+                self._remove(key)
+
+            self._stats["misses"] += 1
+            token = next(self._tokens)
+            self._carregando[token] = usuario
+
+        try:
+            linhas = loader()
+
+        finally:
+            with self._lock:
+                del self._carregando[token]
+                obsoleto = token in self._obsoletos
+                self._obsoletos.discard(token)
+
+        with self._lock:
+            if not obsoleto and len(linhas) <= self.max_rows and key not in self._entries:
+                self._entries[key] = (linhas, time.monotonic() + self.ttl)
+                self._por_usuario.setdefault(usuario, set()).add(consulta)
+                self._rows += len(linhas)
+
+                while self._rows > self.max_rows:
+                    self._remove(next(iter(self._entries)))
+                    self._stats["evictions"] += 1
+
+        return linhas
+
+    def invalidate(self, tipo, user_id):
+        usuario = (tipo, int(user_id))
+
+        with self._lock:
+            self._stats["invalidations"] += 1
+
+            for consulta in list(self._por_usuario.get(usuario, ())):
+                self._remove((*usuario, consulta))
+
+            for token, carregando in self._carregando.items():
+                if carregando == usuario:
+                    self._obsoletos.add(token)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "max_rows": self.max_rows,
+            }
+
+    def _remove(self, key):
+        linhas, _ = self._entries.pop(key)
+        self._rows -= len(linhas)
+
+        usuario = key[:2]
+        consultas = self._por_usuario.get(usuario)
+        if consultas is not None:
+            consultas.discard(key[2])
+            if not consultas:
+                del self._por_usuario[usuario]
@@ -7,15 +7,62 @@ class Config:
     DB_PASSWORD = os.getenv("DB_PASSWORD")
     DB_NAME = os.getenv("DB_NAME")
 
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5")) # Segundos aguardando uma conexão livre.
+    DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+
     RPC_PORT = int(os.getenv("RPC_PORT"))
+    RPC_SERVER_MODE = os.getenv("RPC_SERVER_MODE", "threaded") # "threaded" (thread por requisição) ou "pool".
+    RPC_WORKERS = int(os.getenv("RPC_WORKERS", "32"))
+    RPC_QUEUE_SIZE = int(os.getenv("RPC_QUEUE_SIZE", "128")) # Conexões aguardando worker antes de responder 503.
+    RPC_KEEPALIVE_TIMEOUT = float(os.getenv("RPC_KEEPALIVE_TIMEOUT", "15"))
+
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+    LOTE_MAX_AGENDAMENTOS = int(os.getenv("LOTE_MAX_AGENDAMENTOS", "500"))
+    DISPONIBILIDADE_MAX_DIAS = int(os.getenv("DISPONIBILIDADE_MAX_DIAS", "31"))
+    DISPONIBILIDADE_MAX_MEDICOS = int(os.getenv("DISPONIBILIDADE_MAX_MEDICOS", "50"))
+    ESTATISTICAS_MAX_DIAS = int(os.getenv("ESTATISTICAS_MAX_DIAS", "31")) # Intervalo máximo do detalhe por dia.
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000")) # Linhas buscadas por vez do cursor de exportação.
+
+    ROLE_CACHE_MAX_SIZE = int(os.getenv("ROLE_CACHE_MAX_SIZE", "10000"))
+    ROLE_CACHE_TTL = float(os.getenv("ROLE_CACHE_TTL", "60")) # Segundos; 0 desativa o cache.
+    ROLE_CACHE_NEGATIVE_TTL = float(os.getenv("ROLE_CACHE_NEGATIVE_TTL", "10")) # Resultados "usuário não encontrado".
+
+    RESULT_CACHE_MAX_ROWS = int(os.getenv("RESULT_CACHE_MAX_ROWS", "50000")) # Total de agendamentos guardados no cache de consultas.
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300")) # Segundos; rede de segurança para escritas fora do serviço.
 
     VALIDATION_HOST = os.getenv("VALIDATION_HOST")
     VALIDATION_PORT = int(os.getenv("VALIDATION_PORT"))
-    BUFFER_SIZE = 4096
+    VALIDATION_POOL_SIZE = int(os.getenv("VALIDATION_POOL_SIZE", "4")) # Conexões keep-alive com o serviço de validação.
+    VALIDATION_TIMEOUT = float(os.getenv("VALIDATION_TIMEOUT", "5"))
+    VALIDATION_KEEPALIVE_IDLE = int(os.getenv("VALIDATION_KEEPALIVE_IDLE", "30")) # Segundos ocioso até a primeira sonda TCP.
+    VALIDATION_KEEPALIVE_INTERVAL = int(os.getenv("VALIDATION_KEEPALIVE_INTERVAL", "10"))
+    VALIDATION_KEEPALIVE_COUNT = int(os.getenv("VALIDATION_KEEPALIVE_COUNT", "3"))
 
     RABBITMQ_HOST = os.getenv("RABBITMQ_HOST")
     RABBITMQ_PORT = int(os.getenv("RABBITMQ_PORT"))
     RABBITMQ_USER = os.getenv("RABBITMQ_USER")
     RABBITMQ_PASSWORD = os.getenv("RABBITMQ_PASSWORD")
+    RABBITMQ_VHOST = os.getenv("RABBITMQ_VHOST", "/")
+    RABBITMQ_MANAGEMENT_URL = os.getenv("RABBITMQ_MANAGEMENT_URL", f"http://{RABBITMQ_HOST}:15672") # Migração e benchmark.
+
+    RABBITMQ_CONFIRM_TIMEOUT = float(os.getenv("RABBITMQ_CONFIRM_TIMEOUT", "5")) # Segundos aguardando o ack do broker.
+    RABBITMQ_RECONNECT_DELAY = float(os.getenv("RABBITMQ_RECONNECT_DELAY", "2"))
+
+    NOTIFICATION_EXCHANGE = "notifications"
+    NOTIFICATION_ROUTING = os.getenv("NOTIFICATION_ROUTING", "usuario") # "usuario" (fila por usuário) ou "shard".
+    NOTIFICATION_SHARDS = int(os.getenv("NOTIFICATION_SHARDS", "16")) # Igual no serviço e nos clientes.
+    NOTIFICATION_SHARD_MAX_AGE = os.getenv("NOTIFICATION_SHARD_MAX_AGE", "7D") # Retenção dos streams.
+    NOTIFICATION_ENCODING = os.getenv("NOTIFICATION_ENCODING", "json") # "json" ou "binary" (após atualizar os clientes).
+
+    OCCUPANCY_INDEX_ENABLED = os.getenv("OCCUPANCY_INDEX_ENABLED", "1") == "1"
+    OCCUPANCY_CHANNEL = "agendamento_ocupacao" # Eventos do trigger trg_agendamento_ocupacao.
+    OCCUPANCY_POLL_INTERVAL = float(os.getenv("OCCUPANCY_POLL_INTERVAL", "1"))
 
-    NOTIFICATION_EXCHANGE = "notifications"
\ No newline at end of file
+    OUTBOX_CHANNEL = "notificacao_outbox" # Canal LISTEN/NOTIFY que acorda o relay.
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1")) # Segundos entre varreduras sem NOTIFY.
+    OUTBOX_MAX_BACKOFF = int(os.getenv("OUTBOX_MAX_BACKOFF", "60")) # Segundos; limite do backoff exponencial.
+    OUTBOX_COALESCE_WINDOW = float(os.getenv("OUTBOX_COALESCE_WINDOW_MS", "200")) / 1000 # Janela de agrupamento; 0 desativa.
\ No newline at end of file
@@ -1,5 +1,12 @@
+import threading
+
 import psycopg2
 from src.config import Config
+from src.database.pool import ConnectionPool
+from src.database.statements import PreparingConnection
+
+_pool = None
+_pool_lock = threading.Lock()
 
 def get_connection():
     return psycopg2.connect(
@@ -7,5 +14,23 @@ def get_connection():
         port=Config.DB_PORT,
         user=Config.DB_USER,
         password=Config.DB_PASSWORD,
-        dbname=Config.DB_NAME
-    )
\ No newline at end of file
+        dbname=Config.DB_NAME,
+        connection_factory=PreparingConnection
+    )
+
+def get_pool():
+    global _pool
+
+    # Pool único por processo, compartilhado pelas threads do servidor XML-RPC.
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    get_connection,
+                    min_size=Config.DB_POOL_MIN_SIZE,
+                    max_size=Config.DB_POOL_MAX_SIZE,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    health_check_interval=Config.DB_POOL_HEALTH_CHECK_INTERVAL
+                )
+
+    return _pool
@@ -0,0 +1,45 @@
+import select
+
+from psycopg2 import extensions
+from src.database.connection import get_connection
+
+class PgListener:
+    # Conexão dedicada (fora do pool, em autocommit) para LISTEN em um canal do Postgres.
+    def __init__(self, channel):
+        self.channel = channel
+        self._conn = None
+
+    @property
+    def connected(self):
+        return self._conn is not None and not self._conn.closed
+
+    def connect(self):
+        if self.connected:
+            return False
+
+        conn = get_connection()
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+
+        self._conn = conn
+        return True
+
+    def wait(self, timeout):
+        # Aguarda até timeout segundos e retorna os payloads recebidos (possivelmente nenhum).
+        readable, _, _ = select.select([self._conn], [], [], timeout)
+        if not readable:
+            return []
+
+        self._conn.poll()
+        payloads = [notify.payload for notify in self._conn.notifies]
+        self._conn.notifies.clear()
+        return payloads
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
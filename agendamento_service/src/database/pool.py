@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+class PoolTimeoutError(Exception):
+    pass
+
+class ConnectionPool:
+    def __init__(self, connect, min_size, max_size, timeout, health_check_interval):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamanhos inválidos para o pool de conexões.")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque() # (conexão, instante em que foi devolvida)
+        self._size = 0 # Conexões abertas (ociosas + emprestadas).
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+            self._stats["created"] += 1
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Erro interno: pool de conexões encerrado.")
+
+                if self._idle:
+                    conn, returned_at = self._idle.pop() # LIFO: reaproveita a conexão mais "quente".
+                    break
+
+                if self._size < self.max_size:
+                    self._size += 1 # Reserva a vaga antes de conectar fora do lock.
+                    conn, returned_at = None, None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError("Erro interno: tempo esgotado aguardando conexão com o banco.")
+
+                self._stats["waits"] += 1
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        if conn is not None and not self._is_healthy(conn, returned_at):
+            # A vaga continua reservada e é reaproveitada pela nova conexão.
+            self._close_quietly(conn)
+            with self._cond:
+                self._stats["discarded"] += 1
+                self._stats["health_check_failures"] += 1
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+            with self._cond:
+                self._stats["created"] += 1
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+
+        return conn
+
+    def release(self, conn, discard=False):
+        if not discard and not conn.closed:
+            try:
+                # Conexões sempre voltam para o pool sem transação aberta.
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed:
+            self._discard(conn)
+            with self._cond:
+                self._cond.notify() # Libera a vaga para quem estiver aguardando.
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                conn.close()
+                return
+
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True # Conexão possivelmente quebrada, não deve voltar ao pool.
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def _is_healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+
+        # Só faz round-trip de verificação em conexões ociosas há algum tempo.
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+                self._size -= 1
+            self._cond.notify_all()
@@ -0,0 +1,21 @@
+from psycopg2 import extensions
+
+class PreparingConnection(extensions.connection):
+    # Conexão que lembra quais statements já foram preparados na sua sessão.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+def execute_prepared(cursor, statements, name, params=()):
+    # PREPARE acontece uma vez por conexão do pool; depois só EXECUTE, reaproveitando o plano.
+    conn = cursor.connection
+
+    if name not in conn.prepared:
+        cursor.execute(f"PREPARE {name} AS {statements[name]}")
+        conn.prepared.add(name)
+
+    if params:
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+    else:
+        cursor.execute(f"EXECUTE {name}")
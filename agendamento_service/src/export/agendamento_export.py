@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import xmlrpc.client
+
+from src.config import Config
+from src.repository.agendamento_repository import COLUNAS
+from src.utils.validators import validar_enum
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+def encode_chunks(chunks, formato):
+    # Converte cada bloco de linhas do cursor em um bloco de bytes; só o bloco atual fica em memória.
+    if formato == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(COLUNAS)
+
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+
+            buffer.seek(0)
+            buffer.truncate()
+
+        # Tabela vazia: o cabeçalho ainda não foi entregue.
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    elif formato == "jsonl":
+        for rows in chunks:
+            yield "".join(
+                json.dumps(dict(zip(COLUNAS, row)), default=str, ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode()
+
+    else:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+
+def export_to_file(repository, path, formato, status=None):
+    with open(path, "wb") as f:
+        for data in encode_chunks(repository.iter_export(status, Config.EXPORT_CHUNK_SIZE), formato):
+            f.write(data)
+
+def http_export(service, params):
+    # Rota GET /export/agendamentos?token=...&formato=csv|jsonl&status=...
+    # Retorna (content-type, gerador de bytes) para o servidor enviar em chunks.
+    token = params.get("token")
+    formato = params.get("formato", "csv")
+    status = params.get("status")
+
+    if not token:
+        raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+    if formato not in FORMATOS:
+        raise xmlrpc.client.Fault(1, f"Formato inválido. Opções: {', '.join(sorted(FORMATOS))}")
+
+    try:
+        if status:
+            validar_enum(status, service.STATUS, "Status")
+
+        requester_role = service.users_client.get_user_role(token, token)
+
+        if requester_role not in {"RECEPCIONISTA", "ADMINISTRADOR"}:
+            raise xmlrpc.client.Fault(1, "Permissão negada para exportar agendamentos.")
+
+    except xmlrpc.client.Fault:
+        raise
+
+    except Exception as e:
+        msg = str(e)
+        if "interno" in msg.lower():
+            raise xmlrpc.client.Fault(2, msg)
+        else:
+            raise xmlrpc.client.Fault(1, msg)
+
+    chunks = service.agendamento_repository.iter_export(status, Config.EXPORT_CHUNK_SIZE)
+    return FORMATOS[formato], encode_chunks(chunks, formato)
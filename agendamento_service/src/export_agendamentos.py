@@ -0,0 +1,25 @@
+import argparse
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.export.agendamento_export import FORMATOS, export_to_file
+from src.repository.agendamento_repository import AgendamentoRepository
+
+# Exportação noturna para arquivo, ex.: python src/export_agendamentos.py --formato csv --saida /exports/agendamentos.csv
+def main():
+    parser = argparse.ArgumentParser(description="Exporta a tabela agendamento em CSV ou JSONL")
+    parser.add_argument("--saida", required=True, help="Caminho do arquivo gerado")
+    parser.add_argument("--formato", choices=sorted(FORMATOS), default="csv")
+    parser.add_argument(
+        "--status",
+        required=False,
+        choices=['PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO']
+    )
+    args = parser.parse_args()
+
+    export_to_file(AgendamentoRepository(), args.saida, args.formato, args.status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+class RoleCache:
+    # Cache LRU com TTL para resultados de GetUser. Chave: (requester_id, target_id),
+    # pois a permissão de visualização depende de quem consulta.
+    def __init__(self, max_size, ttl, negative_ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries = OrderedDict() # chave -> (found, valor, expira_em)
+        self._inflight = {} # chave -> Future da consulta em andamento.
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "negative_hits": 0,
+            "coalesced": 0,
+            "evictions": 0,
+        }
+
+    def get_or_load_async(self, key, start_load):
+        # start_load() inicia a consulta e retorna um Future de (found, valor), sem bloquear;
+        # found=False é cacheado com negative_ttl. Retorna um Future com o mesmo resultado,
+        # já concluído em caso de hit.
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                found, value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats["hits" if found else "negative_hits"] += 1
+
+                    hit = Future()
+                    hit.set_result((found, value))
+                    return hit
+
+                del self._entries[key]
+
+            # Misses concorrentes para a mesma chave aguardam uma única chamada.
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._stats["coalesced"] += 1
+                return flight
+
+            flight = Future()
+            self._inflight[key] = flight
+            self._stats["misses"] += 1
+
+        try:
+            load = start_load()
+        except BaseException as e:
+            self._complete(key, flight, None, e)
+            return flight
+
+        load.add_done_callback(lambda done: self._complete(key, flight, done, None))
+        return flight
+
+    def _complete(self, key, flight, done, error):
+        if error is None:
+            error = done.exception()
+
+        with self._lock:
+            if error is None:
+                found, value = done.result()
+                ttl = self.ttl if found else self.negative_ttl
+
+                if ttl > 0 and self._inflight.get(key) is flight:
+                    self._entries[key] = (found, value, time.monotonic() + ttl)
+                    self._entries.move_to_end(key)
+
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                        self._stats["evictions"] += 1
+
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+
+        if error is None:
+            flight.set_result(done.result())
+        else:
+            flight.set_exception(error)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._inflight.clear()
+                return
+
+            for key in [k for k in self._entries if user_id in k]:
+                del self._entries[key]
+
+            # Consultas em andamento não devem popular o cache com dados anteriores à invalidação.
+            for key in [k for k in self._inflight if user_id in k]:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
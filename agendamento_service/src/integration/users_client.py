@@ -1,5 +1,8 @@
 import grpc
 import os
+from concurrent.futures import Future
+from src.config import Config
+from src.integration.role_cache import RoleCache
 from src.pb import users_pb2, users_pb2_grpc
 
 class UsersClient:
@@ -8,18 +11,70 @@ class UsersClient:
         self.channel = grpc.insecure_channel(self.address)
         self.stub = users_pb2_grpc.UserServiceStub(self.channel)
 
+        self.role_cache = RoleCache(
+            max_size=Config.ROLE_CACHE_MAX_SIZE,
+            ttl=Config.ROLE_CACHE_TTL,
+            negative_ttl=Config.ROLE_CACHE_NEGATIVE_TTL
+        )
+
     def get_user_role(self, requester_id, target_id):
+        return self.get_user_role_async(requester_id, target_id).result()
+
+    def get_user_role_async(self, requester_id, target_id):
+        # Usa o Future do próprio gRPC (GetUser.future): nenhuma thread fica presa por
+        # consulta em andamento, então lotes grandes não disputam um executor com as
+        # chamadas individuais. Retorna um Future com a role ou a exceção.
+        role = Future()
+        role.set_running_or_notify_cancel() # cancel() vira no-op, como numa tarefa já em execução.
+
         try:
-            response = self.stub.GetUser(
-                users_pb2.GetUserRequest(
-                    token=int(requester_id),
-                    user_id=int(target_id)
-                )
-            )
-            return users_pb2.UserType.Name(response.user_type)
+            key = (int(requester_id), int(target_id))
+        except Exception:
+            role.set_exception(Exception(f"Erro interno no servidor"))
+            return role
+
+        def resolve(flight):
+            try:
+                found, value = flight.result()
+            except Exception as e:
+                role.set_exception(e)
+                return
+
+            if found:
+                role.set_result(value)
+            else:
+                role.set_exception(Exception(value))
 
-        except grpc.RpcError as e:
-            raise Exception(e.details())
+        self.role_cache.get_or_load_async(key, lambda: self._fetch_user_role(*key)).add_done_callback(resolve)
+        return role
 
-        except Exception as e:
-            raise Exception(f"Erro interno no servidor")
\ No newline at end of file
+    def invalidate_user(self, user_id=None):
+        self.role_cache.invalidate(None if user_id is None else int(user_id))
+
+    def _fetch_user_role(self, requester_id, target_id):
+        # Future de (found, role) concluído pelo callback do gRPC.
+        result = Future()
+
+        def done(call):
+            try:
+                response = call.result()
+                result.set_result((True, users_pb2.UserType.Name(response.user_type)))
+
+            except grpc.RpcError as e:
+                # "Usuário não encontrado" é cacheado como resultado negativo.
+                if e.code() == grpc.StatusCode.NOT_FOUND:
+                    result.set_result((False, e.details()))
+                else:
+                    result.set_exception(Exception(e.details()))
+
+            except Exception:
+                result.set_exception(Exception(f"Erro interno no servidor"))
+
+        call = self.stub.GetUser.future(
+            users_pb2.GetUserRequest(
+                token=requester_id,
+                user_id=target_id
+            )
+        )
+        call.add_done_callback(done)
+        return result
@@ -1,8 +1,145 @@
+import itertools
 import socket
-import json
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
 from src.config import Config
+from src.integration.validation_protocol import encode_frame, recv_frame
+
+class ValidationConnection:
+    # Conexão keep-alive com o serviço de validação. Várias threads podem enviar requisições
+    # em pipeline; uma thread leitora entrega cada resposta ao Future do seu "id".
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port), timeout=Config.VALIDATION_TIMEOUT)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._enable_keepalive()
+        self.sock.settimeout(None)
+
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+        self._reader = threading.Thread(target=self._read_loop, name="validation-reader", daemon=True)
+        self._reader.start()
+
+    def request(self, payload):
+        future = Future()
+
+        with self._lock:
+            if self.closed:
+                raise ConnectionError("Conexão com o serviço de validação encerrada.")
+
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+
+        try:
+            with self._send_lock:
+                self.sock.sendall(encode_frame({**payload, "id": request_id}))
+        except OSError as e:
+            self._fail(e)
+            raise
+
+        return future
+
+    def close(self):
+        self._fail(ConnectionError("Conexão com o serviço de validação encerrada."))
+
+    def _enable_keepalive(self):
+        # Sem keepalive, uma conexão half-open (servidor sumiu sem RST) deixa a thread
+        # leitora bloqueada para sempre. Opções TCP_KEEP* só existem em alguns sistemas.
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        for option, value in (
+            ("TCP_KEEPIDLE", Config.VALIDATION_KEEPALIVE_IDLE),
+            ("TCP_KEEPINTVL", Config.VALIDATION_KEEPALIVE_INTERVAL),
+            ("TCP_KEEPCNT", Config.VALIDATION_KEEPALIVE_COUNT),
+        ):
+            if hasattr(socket, option):
+                self.sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    def _read_loop(self):
+        error = ConnectionError("Conexão com o serviço de validação encerrada.")
+
+        try:
+            while True:
+                message = recv_frame(self.sock)
+                if message is None:
+                    break
+
+                with self._lock:
+                    future = self._pending.pop(message.get("id"), None)
+
+                if future is not None:
+                    future.set_result(message)
+
+        except Exception as e:
+            error = e
+
+        finally:
+            self._fail(error)
+
+    def _fail(self, error):
+        with self._lock:
+            if self.closed:
+                return
+
+            self.closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        # shutdown antes do close: só o close não acorda a thread leitora bloqueada no recv.
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+class ValidationConnectionPool:
+    # Pequeno conjunto de conexões keep-alive usadas em rodízio.
+    def __init__(self, host, port, size):
+        self.host = host
+        self.port = port
+        self._connections = [None] * size
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def get(self):
+        index = next(self._next) % len(self._connections)
+
+        with self._lock:
+            conn = self._connections[index]
+
+            if conn is None or conn.closed:
+                conn = ValidationConnection(self.host, self.port)
+                self._connections[index] = conn
+
+            return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                if conn is not None:
+                    conn.close()
+
+            self._connections = [None] * len(self._connections)
 
 class ValidationClient:
+    def __init__(self):
+        self.pool = ValidationConnectionPool(
+            Config.VALIDATION_HOST,
+            Config.VALIDATION_PORT,
+            Config.VALIDATION_POOL_SIZE
+        )
 
     def validate_payment(self, tipo_pagamento, dados_pagamento):
         payload = {
@@ -10,18 +147,52 @@ class ValidationClient:
             "dados_pagamento": dados_pagamento
         }
 
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as client:
-                client.connect((Config.VALIDATION_HOST, Config.VALIDATION_PORT))
+        data = self._request(payload)
+        if "erro" in data:
+            raise Exception(data["erro"])
+
+        return data["status"]
 
-                client.sendall(json.dumps(payload).encode())
-                response = client.recv(Config.BUFFER_SIZE)
+    def validate_payments(self, pagamentos):
+        # pagamentos: lista de (tipo_pagamento, dados_pagamento). Um único round-trip para o lote.
+        # Retorna, na ordem do lote, {"status": ...} ou {"erro": ...} por item: um item inválido
+        # não descarta o resultado dos demais. Só falhas do lote inteiro levantam exceção.
+        payload = {
+            "pagamentos": [
+                {"tipo_pagamento": tipo_pagamento, "dados_pagamento": dados_pagamento}
+                for tipo_pagamento, dados_pagamento in pagamentos
+            ]
+        }
 
-            data = json.loads(response.decode())
-            if "erro" in data:
-                raise Exception(data["erro"])
+        data = self._request(payload)
+        if "erro" in data:
+            raise Exception(data["erro"])
 
-            return data["status"]
+        resultados = data["resultados"]
+        if len(resultados) != len(pagamentos):
+            raise Exception("Erro interno: resposta de lote incompleta do serviço de validação.")
 
-        except Exception as e:
-            raise
+        return resultados
+
+    def _request(self, payload):
+        # A validação é idempotente: uma conexão keep-alive derrubada pelo servidor
+        # é substituída e a requisição reenviada uma vez.
+        for tentativa in range(2):
+            conn = None
+
+            try:
+                conn = self.pool.get()
+                return conn.request(payload).result(timeout=Config.VALIDATION_TIMEOUT)
+
+            except FutureTimeoutError:
+                # Conexão possivelmente half-open: fechá-la remove a requisição de _pending
+                # (e falha as demais nela), e o pool.get() seguinte reconecta.
+                conn.close()
+                raise Exception("Erro interno: tempo esgotado aguardando o serviço de validação.")
+
+            except (OSError, ConnectionError):
+                if tentativa == 1:
+                    raise Exception("Erro interno: serviço de validação indisponível.")
+
+            except Exception:
+                raise Exception("Erro interno: falha na comunicação com o serviço de validação.")
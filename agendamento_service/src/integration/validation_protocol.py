@@ -0,0 +1,48 @@
+import json
+import struct
+
+# Protocolo framed: cada mensagem é um JSON precedido pelo seu tamanho (4 bytes, big-endian).
+# Requisições carregam um "id" devolvido na resposta, permitindo várias requisições
+# em pipeline na mesma conexão.
+HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+class ProtocolError(Exception):
+    pass
+
+def encode_frame(message):
+    body = json.dumps(message).encode()
+    return HEADER.pack(len(body)) + body
+
+def decode_header(header):
+    (size,) = HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame excede o tamanho máximo ({size} bytes).")
+    return size
+
+def decode_body(body):
+    return json.loads(body.decode())
+
+def recv_exact(sock, size):
+    buffer = bytearray()
+
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            if not buffer:
+                return None
+            raise ProtocolError("Conexão encerrada no meio de um frame.")
+        buffer += chunk
+
+    return bytes(buffer)
+
+def recv_frame(sock):
+    header = recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+
+    body = recv_exact(sock, decode_header(header))
+    if body is None:
+        raise ProtocolError("Conexão encerrada no meio de um frame.")
+
+    return decode_body(body)
@@ -1,29 +1,64 @@
 import sys
 import os
-from xmlrpc.server import SimpleXMLRPCServer
-from socketserver import ThreadingMixIn
 
 sys.path.append(os.getcwd())
 
 from src.config import Config
+from src.cache.occupancy_index import OccupancySync
+from src.database.connection import get_pool
+from src.export.agendamento_export import http_export
+from src.rabbitmq.outbox_relay import OutboxRelay
+from src.server.xmlrpc_server import PooledXMLRPCServer, ThreadedXMLRPCServer
 from src.service.agendamento_service import AgendamentoService
 
-class ThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
-    pass
-
 def main():
     address = ('0.0.0.0', Config.RPC_PORT)
 
-    server = ThreadedXMLRPCServer(address, allow_none=True)
+    if Config.RPC_SERVER_MODE == "pool":
+        server = PooledXMLRPCServer(
+            address,
+            workers=Config.RPC_WORKERS,
+            queue_size=Config.RPC_QUEUE_SIZE,
+            allow_none=True
+        )
+    else:
+        server = ThreadedXMLRPCServer(address, allow_none=True)
 
     service = AgendamentoService()
+    service.estatisticas.seed(service.agendamento_repository.count_by_group())
+
     server.register_instance(service)
     server.register_introspection_functions()
+    server.register_multicall_functions() # system.multicall: várias chamadas em uma requisição HTTP.
+
+    # Exportação em streaming (CSV/JSONL) via GET, fora do XML-RPC.
+    server.register_get_route("/export/agendamentos", lambda params: http_export(service, params))
+
+    # Métricas operacionais.
+    server.register_function(lambda: get_pool().stats(), "estatisticas_pool")
+    server.register_function(service.users_client.role_cache.stats, "estatisticas_cache_roles")
+    server.register_function(service.result_cache.stats, "estatisticas_cache_consultas")
+
+    relay = OutboxRelay()
+    relay.start()
+    server.register_function(relay.stats, "estatisticas_outbox")
+
+    occupancy_sync = OccupancySync(service.occupancy_index, service.agendamento_repository)
+    if Config.OCCUPANCY_INDEX_ENABLED:
+        occupancy_sync.start()
+    server.register_function(service.occupancy_index.stats, "estatisticas_ocupacao")
+
+    if isinstance(server, PooledXMLRPCServer):
+        server.register_function(server.stats, "estatisticas_servidor")
 
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         pass
+    finally:
+        relay.stop()
+        occupancy_sync.stop()
+        server.server_close()
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,18 @@
 import pika
 from src.config import Config
 
-def get_connection():
+def get_parameters():
     credentials = pika.PlainCredentials(
         Config.RABBITMQ_USER,
         Config.RABBITMQ_PASSWORD
     )
 
-    parameters = pika.ConnectionParameters(
+    return pika.ConnectionParameters(
         host=Config.RABBITMQ_HOST,
         port=Config.RABBITMQ_PORT,
+        virtual_host=Config.RABBITMQ_VHOST,
         credentials=credentials
     )
 
-    return pika.BlockingConnection(parameters)
\ No newline at end of file
+def get_connection():
+    return pika.BlockingConnection(get_parameters())
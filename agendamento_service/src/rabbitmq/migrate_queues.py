@@ -0,0 +1,109 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import urllib.parse
+import urllib.request
+
+sys.path.append(os.getcwd())
+
+import pika
+from src.config import Config
+from src.rabbitmq.connection import get_connection
+from src.rabbitmq.routing import shard_of, shard_queue, shard_queue_arguments, shard_routing_key
+
+# Migração das filas por usuário (notifications.user.{id}) para os shards.
+#
+#   1. Clientes atualizados com NOTIFICATION_ROUTING=shard: leem o stream do shard e ainda
+#      esvaziam a fila antiga do usuário, se existir.
+#   2. agendamento_service com NOTIFICATION_ROUTING=shard: nada novo vai para as filas antigas.
+#   3. Este script: move o que restou em cada fila antiga para o shard do usuário (com o header
+#      user_id) e apaga a fila. Pode ser executado de novo com segurança.
+#
+# Uso (a partir de agendamento_service/, com as variáveis RABBITMQ_* do docker-compose):
+#   python src/rabbitmq/migrate_queues.py [--dry-run]
+PREFIXO_LEGADO = "notifications.user."
+
+def listar_filas_legadas():
+    # A API AMQP não lista filas; usa a API HTTP do plugin de management.
+    url = f"{Config.RABBITMQ_MANAGEMENT_URL}/api/queues/{urllib.parse.quote(Config.RABBITMQ_VHOST, safe='')}?columns=name,messages"
+    credenciais = base64.b64encode(f"{Config.RABBITMQ_USER}:{Config.RABBITMQ_PASSWORD}".encode()).decode()
+
+    request = urllib.request.Request(url, headers={"Authorization": f"Basic {credenciais}"})
+    with urllib.request.urlopen(request) as response:
+        filas = json.load(response)
+
+    return [(fila["name"], fila.get("messages", 0)) for fila in filas if fila["name"].startswith(PREFIXO_LEGADO)]
+
+def migrar_fila(channel, nome, shards_declarados):
+    user_id = int(nome[len(PREFIXO_LEGADO):])
+    shard = shard_of(user_id)
+
+    if shard not in shards_declarados:
+        channel.queue_declare(queue=shard_queue(shard), durable=True, arguments=shard_queue_arguments())
+        channel.queue_bind(queue=shard_queue(shard), exchange=Config.NOTIFICATION_EXCHANGE, routing_key=shard_routing_key(shard))
+        shards_declarados.add(shard)
+
+    movidas = 0
+    while True:
+        method, properties, body = channel.basic_get(queue=nome, auto_ack=False)
+        if method is None:
+            break
+
+        # Com confirm_delivery, basic_publish só retorna após o ack do broker: a mensagem
+        # nunca é removida da fila antiga antes de estar no shard.
+        channel.basic_publish(
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            routing_key=shard_routing_key(shard),
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                content_type=properties.content_type,
+                headers={**(properties.headers or {}), "user_id": user_id}
+            )
+        )
+        channel.basic_ack(method.delivery_tag)
+        movidas += 1
+
+    channel.queue_delete(queue=nome, if_empty=True)
+    return movidas
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra as filas por usuário para os shards de notificação")
+    parser.add_argument("--dry-run", action="store_true", help="Só lista as filas que seriam migradas")
+    parser.add_argument("--forcar", action="store_true", help="Migra mesmo com NOTIFICATION_ROUTING diferente de shard")
+    args = parser.parse_args()
+
+    if Config.NOTIFICATION_ROUTING != "shard" and not args.forcar:
+        print("NOTIFICATION_ROUTING não é 'shard': o serviço ainda publica nas filas por usuário.")
+        return
+
+    filas = listar_filas_legadas()
+    print(f"{len(filas)} fila(s) por usuário encontradas.")
+
+    if args.dry_run:
+        for nome, mensagens in filas:
+            print(f"{nome}: {mensagens} mensagem(ns)")
+        return
+
+    connection = get_connection()
+    channel = connection.channel()
+    channel.confirm_delivery()
+
+    shards_declarados = set()
+    total = 0
+
+    try:
+        for nome, _ in filas:
+            movidas = migrar_fila(channel, nome, shards_declarados)
+            total += movidas
+            print(f"{nome}: {movidas} mensagem(ns) movida(s) para {shard_queue(shard_of(nome[len(PREFIXO_LEGADO):]))}")
+
+    finally:
+        connection.close()
+
+    print(f"\n{total} mensagem(ns) migrada(s).")
+
+if __name__ == "__main__":
+    main()
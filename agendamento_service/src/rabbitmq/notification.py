@@ -1,8 +1,25 @@
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
 import json
+import struct
 
-@dataclass
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_BINARY = "application/vnd.clinica.notificacao"
+
+# Formato binário, versão no primeiro byte. v1 (big-endian, 32 bytes):
+#   versão B | user_id Q | agendamento_id Q | status B | origem B | timestamp q (µs desde a época, UTC)
+#   | data i (ordinal) | horario B
+# A mensagem não viaja: o consumidor a monta a partir de data, horario e status.
+BINARY_VERSION = 1
+BINARY_V1 = struct.Struct(">BQQBBqiB")
+
+# Só acrescentar no fim: o índice é o código no formato binário.
+STATUS_CODES = ("PENDENTE", "CONFIRMADO", "REJEITADO", "CONCLUIDO", "CANCELADO")
+ORIGEM_CODES = ("AGENDAMENTO",)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+@dataclass(slots=True)
 class Notification:
     user_id: int
     agendamento_id: int
@@ -10,6 +27,45 @@ class Notification:
     mensagem: str
     origem: str = "AGENDAMENTO"
     timestamp: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    data: str = None # YYYY-MM-DD da consulta; necessário para o formato binário.
+    horario: int = None
 
     def to_json(self) -> str:
-        return json.dumps(self.__dict__)
\ No newline at end of file
+        return json.dumps(asdict(self))
+
+    def to_binary(self) -> bytes:
+        # ValueError se algum campo não couber no formato (ex.: notificação antiga sem data).
+        if self.data is None or self.horario is None:
+            raise ValueError("Notificação sem data/horário estruturados.")
+
+        if self.novo_status not in STATUS_CODES or self.origem not in ORIGEM_CODES:
+            raise ValueError("Status ou origem sem código no formato binário.")
+
+        instante = datetime.fromisoformat(self.timestamp)
+        if instante.tzinfo is None:
+            instante = instante.replace(tzinfo=timezone.utc)
+
+        try:
+            return BINARY_V1.pack(
+                BINARY_VERSION,
+                int(self.user_id),
+                int(self.agendamento_id),
+                STATUS_CODES.index(self.novo_status),
+                ORIGEM_CODES.index(self.origem),
+                (instante - EPOCH) // timedelta(microseconds=1),
+                date.fromisoformat(self.data).toordinal(),
+                int(self.horario)
+            )
+        except struct.error as e:
+            raise ValueError(str(e))
+
+    def encode(self, formato) -> tuple:
+        # (corpo, content_type). Durante a migração o padrão continua JSON; no formato
+        # binário, o que não puder ser codificado sai em JSON e o content_type avisa o consumidor.
+        if formato == "binary":
+            try:
+                return self.to_binary(), CONTENT_TYPE_BINARY
+            except ValueError:
+                pass
+
+        return self.to_json().encode(), CONTENT_TYPE_JSON
@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import wait
+
+from src.config import Config
+from src.database.listener import PgListener
+from src.rabbitmq.publisher import get_publisher
+from src.repository.outbox_repository import OutboxRepository
+
+class OutboxRelay:
+    # Thread de fundo que drena a tabela notificacao_outbox para a exchange de notificações.
+    # Acorda por LISTEN/NOTIFY a cada commit com notificações e, na falta dele, por varredura
+    # periódica (que também cobre os reenvios agendados).
+    def __init__(self, repository=None):
+        self.repository = repository or OutboxRepository()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listener = PgListener(Config.OUTBOX_CHANNEL)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"publicadas": 0, "falhas": 0, "lotes": 0, "coalescidas": 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(Config.OUTBOX_POLL_INTERVAL * 2)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listener.connect()
+
+                # Drena enquanto vierem lotes cheios.
+                while not self._stop.is_set():
+                    if self.repository.process_pending(Config.OUTBOX_BATCH_SIZE, self._publicar) < Config.OUTBOX_BATCH_SIZE:
+                        break
+
+                # Acordado por NOTIFY: espera a janela de coalescência para que mudanças rápidas
+                # do mesmo agendamento (ex.: PENDENTE -> CONFIRMADO -> CANCELADO) caiam no mesmo lote.
+                if self._listener.wait(Config.OUTBOX_POLL_INTERVAL) and Config.OUTBOX_COALESCE_WINDOW > 0:
+                    self._stop.wait(Config.OUTBOX_COALESCE_WINDOW)
+
+            except Exception:
+                self._listener.close()
+                self._stop.wait(Config.OUTBOX_POLL_INTERVAL)
+
+        self._listener.close()
+
+    def _publicar(self, notificacoes):
+        # Coalescência: de várias notificações do mesmo agendamento no lote só a mais recente
+        # (maior id do outbox) é publicada; as anteriores saem do outbox junto com ela.
+        ultima = {}
+        for indice, notificacao in enumerate(notificacoes):
+            ultima[notificacao.agendamento_id] = indice
+
+        indices = sorted(ultima.values())
+
+        try:
+            confirmacoes = get_publisher().publish_many([notificacoes[i] for i in indices])
+        except Exception:
+            confirmacoes = []
+
+        # Uma única espera pelas confirmações do lote inteiro.
+        wait(confirmacoes, timeout=Config.RABBITMQ_CONFIRM_TIMEOUT)
+
+        publicado = {
+            notificacoes[i].agendamento_id: confirmacao.done() and confirmacao.exception() is None
+            for i, confirmacao in zip(indices, confirmacoes)
+        }
+
+        enviados = [publicado.get(notificacao.agendamento_id, False) for notificacao in notificacoes]
+        confirmadas = list(publicado.values()).count(True)
+
+        with self._stats_lock:
+            self._stats["lotes"] += 1
+            self._stats["publicadas"] += confirmadas
+            self._stats["falhas"] += len(indices) - confirmadas
+            self._stats["coalescidas"] += len(notificacoes) - len(indices)
+
+        return enviados
@@ -1,44 +1,225 @@
+import functools
+import threading
+import time
+from concurrent.futures import Future
+
 import pika
 from src.config import Config
-from src.rabbitmq.connection import get_connection
+from src.rabbitmq.connection import get_parameters
 from src.rabbitmq.notification import Notification
+from src.rabbitmq.routing import route
+
+_publisher = None
+_publisher_lock = threading.Lock()
 
 class NotificationPublisher:
+    # Conexão única por processo: uma thread dedicada roda o ioloop do pika e as threads
+    # do servidor XML-RPC apenas agendam publicações nela (o pika não é thread-safe).
     def __init__(self):
-        self.connection = get_connection()
-        self.channel = self.connection.channel()
+        self._connection = None
+        self._channel = None
+        self._ready = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # Estado abaixo só é acessado pela thread do ioloop.
+        self._declared_queues = set()
+        self._pending_binds = {} # fila -> [(notification, future)] aguardando declare/bind.
+        self._unconfirmed = {} # delivery_tag -> future
+        self._delivery_tag = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notification-publisher", daemon=True)
+                self._thread.start()
+
+    def publish(self, notification: Notification) -> Future:
+        # Retorna um Future resolvido quando o broker confirma (ack) a mensagem.
+        return self.publish_many([notification])[0]
+
+    def publish_many(self, notifications) -> list:
+        # Lote agendado de uma vez na thread do ioloop: as mensagens saem em sequência no canal
+        # e o broker pode confirmar várias com um único ack (multiple=True).
+        self.start()
+
+        if not self._ready.wait(Config.RABBITMQ_CONFIRM_TIMEOUT):
+            raise Exception("Erro interno ao publicar notificação.")
 
-        self.channel.exchange_declare(
+        futures = [Future() for _ in notifications]
+        try:
+            self._connection.ioloop.add_callback_threadsafe(
+                functools.partial(self._publish_many, notifications, futures)
+            )
+        except Exception:
+            raise Exception("Erro interno ao publicar notificação.")
+
+        return futures
+
+    def close(self):
+        self._stopping = True
+        connection = self._connection
+
+        if connection is not None and connection.is_open:
+            connection.ioloop.add_callback_threadsafe(connection.close)
+
+        if self._thread is not None:
+            self._thread.join(Config.RABBITMQ_CONFIRM_TIMEOUT)
+
+    # Callbacks executados na thread do ioloop.
+    def _run(self):
+        while not self._stopping:
+            self._connection = pika.SelectConnection(
+                get_parameters(),
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_open_error,
+                on_close_callback=self._on_connection_closed
+            )
+            self._connection.ioloop.start()
+
+            if not self._stopping:
+                time.sleep(Config.RABBITMQ_RECONNECT_DELAY)
+
+    def _on_connection_open(self, connection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error):
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        self._reset()
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        self._channel = channel
+        channel.add_on_close_callback(self._on_channel_closed)
+
+        channel.exchange_declare(
             exchange=Config.NOTIFICATION_EXCHANGE,
             exchange_type="direct",
-            durable=True
+            durable=True,
+            callback=self._on_exchange_declared
         )
 
-    def publish(self, notification: Notification):
-        try:
-            user_queue_name = f"notifications.user.{notification.user_id}"
+    def _on_channel_closed(self, channel, reason):
+        self._reset()
 
-            self.channel.queue_declare(
-                queue=user_queue_name,
-                durable=True
-            )
+        # Sem canal não há como publicar: fecha a conexão para forçar a reconexão.
+        if self._connection.is_open:
+            self._connection.close()
 
-            self.channel.queue_bind(
-                exchange=Config.NOTIFICATION_EXCHANGE,
-                queue=user_queue_name,
-                routing_key=str(notification.user_id)
-            )
+    def _on_exchange_declared(self, _frame):
+        self._channel.confirm_delivery(self._on_delivery_confirmation, callback=self._on_confirm_selected)
+
+    def _on_confirm_selected(self, _frame):
+        self._ready.set()
 
-            self.channel.basic_publish(
-                exchange=Config.NOTIFICATION_EXCHANGE,
-                routing_key=str(notification.user_id),
-                body=notification.to_json(),
-                properties=pika.BasicProperties(delivery_mode=2) # Mensagens persistente.
+    def _on_delivery_confirmation(self, frame):
+        confirmation = frame.method
+        ack = isinstance(confirmation, pika.spec.Basic.Ack)
+
+        if confirmation.multiple:
+            tags = [tag for tag in self._unconfirmed if tag <= confirmation.delivery_tag]
+        else:
+            tags = [confirmation.delivery_tag]
+
+        for tag in tags:
+            future = self._unconfirmed.pop(tag, None)
+            if future is None:
+                continue
+
+            if ack:
+                future.set_result(True)
+            else:
+                future.set_exception(Exception("Erro interno ao publicar notificação."))
+
+    def _publish_many(self, notifications, futures):
+        for notification, future in zip(notifications, futures):
+            self._publish(notification, future)
+
+    def _publish(self, notification, future):
+        if self._channel is None or not self._channel.is_open:
+            future.set_exception(Exception("Erro interno ao publicar notificação."))
+            return
+
+        queue_name, routing_key, arguments = route(notification.user_id)
+
+        if queue_name in self._declared_queues:
+            self._basic_publish(notification, future)
+            return
+
+        # Declare/bind já em andamento para essa fila: só enfileira a mensagem.
+        waiting = self._pending_binds.get(queue_name)
+        if waiting is not None:
+            waiting.append((notification, future))
+            return
+
+        self._pending_binds[queue_name] = [(notification, future)]
+        self._channel.queue_declare(
+            queue=queue_name,
+            durable=True,
+            arguments=arguments,
+            callback=functools.partial(self._on_queue_declared, queue_name, routing_key)
+        )
+
+    def _on_queue_declared(self, queue_name, routing_key, _frame):
+        self._channel.queue_bind(
+            queue=queue_name,
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            routing_key=routing_key,
+            callback=functools.partial(self._on_queue_bound, queue_name)
+        )
+
+    def _on_queue_bound(self, queue_name, _frame):
+        self._declared_queues.add(queue_name)
+
+        for notification, future in self._pending_binds.pop(queue_name, []):
+            self._basic_publish(notification, future)
+
+    def _basic_publish(self, notification, future):
+        _, routing_key, _ = route(notification.user_id)
+
+        body, content_type = notification.encode(Config.NOTIFICATION_ENCODING)
+
+        self._channel.basic_publish(
+            exchange=Config.NOTIFICATION_EXCHANGE,
+            routing_key=routing_key,
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2, # Mensagens persistente.
+                content_type=content_type, # Consumidores decodificam pelo content_type.
+                headers={"user_id": int(notification.user_id)} # Filtro dos consumidores no modo "shard".
             )
+        )
 
-        except Exception:
-            raise Exception("Erro interno ao publicar notificação.")
+        self._delivery_tag += 1
+        self._unconfirmed[self._delivery_tag] = future
 
-    def close(self):
-        if self.connection and self.connection.is_open:
-            self.connection.close()
+    def _reset(self):
+        self._ready.clear()
+        self._channel = None
+        self._delivery_tag = 0
+        self._declared_queues.clear()
+
+        pending = list(self._unconfirmed.values())
+        for waiting in self._pending_binds.values():
+            pending.extend(future for _, future in waiting)
+
+        self._unconfirmed.clear()
+        self._pending_binds.clear()
+
+        for future in pending:
+            if not future.done():
+                future.set_exception(Exception("Erro interno ao publicar notificação."))
+
+def get_publisher():
+    global _publisher
+
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = NotificationPublisher()
+                _publisher.start()
+
+    return _publisher
@@ -0,0 +1,35 @@
+import zlib
+
+from src.config import Config
+
+# Roteamento das notificações:
+#   "usuario": uma fila durável notifications.user.{id} por usuário (modo original).
+#   "shard":   NOTIFICATION_SHARDS filas do tipo stream, notifications.shard.{n}, escolhidas por
+#              hash do user_id. O user_id vai no header "user_id" e cada consumidor lê o stream
+#              do seu shard filtrando as próprias mensagens (streams não removem mensagens lidas,
+#              então vários usuários compartilham o shard sem roubar mensagens uns dos outros).
+# O cálculo do shard precisa ser idêntico ao do cliente (clients/agendamento_client).
+
+def shard_of(user_id, shards=None):
+    return zlib.crc32(str(int(user_id)).encode()) % (shards or Config.NOTIFICATION_SHARDS)
+
+def user_queue(user_id):
+    return f"notifications.user.{user_id}"
+
+def shard_queue(shard):
+    return f"notifications.shard.{shard}"
+
+def shard_routing_key(shard):
+    # Prefixo evita colisão com as routing keys do modo "usuario" (o próprio id).
+    return f"shard.{shard}"
+
+def shard_queue_arguments():
+    return {"x-queue-type": "stream", "x-max-age": Config.NOTIFICATION_SHARD_MAX_AGE}
+
+def route(user_id):
+    # (fila, routing_key, argumentos do queue_declare) conforme NOTIFICATION_ROUTING.
+    if Config.NOTIFICATION_ROUTING == "shard":
+        shard = shard_of(user_id)
+        return shard_queue(shard), shard_routing_key(shard), shard_queue_arguments()
+
+    return user_queue(user_id), str(user_id), None
@@ -1,166 +1,408 @@
+import uuid
+
 import psycopg2
-from src.database.connection import get_connection
+from psycopg2.extras import execute_values
+from src.database.connection import get_pool
+from src.database.statements import execute_prepared
+from src.repository.outbox_repository import inserir_outbox
+
+# Colunas das listagens, na ordem do SELECT. Formato colunar e exportação usam as tuplas do cursor direto.
+COLUNAS = ("id", "paciente_id", "medico_id", "data", "horario", "especialidade", "tipo_pagamento", "status")
+
+# Statements preparados uma vez por conexão do pool (ver execute_prepared). O filtro de status
+# opcional é parametrizado ($n IS NULL OR status = $n) em vez de duplicar a query.
+# As listagens já devolvem a data como texto, então as tuplas são serializáveis sem conversão.
+STATEMENTS = {
+    "agendamento_insert_finalized": """
+        INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        RETURNING id
+    """,
+    "agendamento_update_status": """
+        UPDATE agendamento
+        SET status = $1
+        WHERE id = $2
+    """,
+    "agendamento_update_status_from": """
+        UPDATE agendamento
+        SET status = $1
+        WHERE id = $2 AND status = $3
+    """,
+    "agendamento_get_by_id": """
+        SELECT id, paciente_id, medico_id, data, horario, status, especialidade
+        FROM agendamento
+        WHERE id = $1
+    """,
+    "agendamento_list_all": """
+        SELECT id, paciente_id, medico_id, data::text, horario,
+               especialidade, tipo_pagamento, status
+        FROM agendamento
+        WHERE ($1::status_agendamento IS NULL OR status = $1)
+        ORDER BY data, horario
+    """,
+    "agendamento_list_by_paciente": """
+        SELECT id, paciente_id, medico_id, data::text, horario,
+               especialidade, tipo_pagamento, status
+        FROM agendamento
+        WHERE paciente_id = $1 AND ($2::status_agendamento IS NULL OR status = $2)
+        ORDER BY data, horario
+    """,
+    "agendamento_list_by_medico": """
+        SELECT id, paciente_id, medico_id, data::text, horario,
+               especialidade, tipo_pagamento, status
+        FROM agendamento
+        WHERE medico_id = $1 AND ($2::status_agendamento IS NULL OR status = $2)
+        ORDER BY data, horario
+    """,
+}
 
 class AgendamentoError(Exception):
     pass
 
 class AgendamentoRepository:
-    def create(self, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento):
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            query = """
-                INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id;
-            """
-            cursor.execute(query, (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento))
-            novo_id = cursor.fetchone()[0]
-            conn.commit()
-            return novo_id
-
-        except psycopg2.IntegrityError as e:
-            conn.rollback()
-            erro_str = str(e)
-            
-            if "uk_horario_medico" in erro_str:
-                raise AgendamentoError("Médico indisponível neste horário.")
-            if "uk_horario_paciente" in erro_str:
-                raise AgendamentoError("Paciente já possui um agendamento neste horário.")
-            
-            raise AgendamentoError("Dados inválidos (verifique se paciente/médico existem).")
-            
-        except Exception as e:
-            conn.rollback()
-            raise e 
-        
-        finally:
-            cursor.close()
-            conn.close()
+    def __init__(self, pool=None):
+        self._pool = pool
 
-    def get_by_id(self, agendamento_id):
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        try:
-            query = """
-                SELECT id, paciente_id, medico_id, data, horario, status
-                FROM agendamento
-                WHERE id = %s
-            """
-            cursor.execute(query, (agendamento_id,))
-            row = cursor.fetchone()
-
-            if not row:
-                return None
-
-            return {
-                "id": row[0],
-                "paciente_id": row[1],
-                "medico_id": row[2],
-                "data": str(row[3]),
-                "horario": row[4],
-                "status": row[5]
-            }
-
-        finally:
-            cursor.close()
-            conn.close()
-
-
-    def list_all(self, status=None):
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        try:
-            if status:
+    @property
+    def pool(self):
+        # Resolvido sob demanda para não conectar ao banco na importação do serviço.
+        return self._pool or get_pool()
+
+    def create_finalized(self, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status, montar_notificacao=None):
+        # Caminho de agendamento: o status final (já validado pelo chamador) entra no próprio
+        # INSERT, junto com a notificação no outbox (montar_notificacao(id)), com um só commit.
+        # A validação do pagamento fica fora da transação: uma chamada de rede lenta não prende
+        # uma conexão do pool nem a entrada do horário no índice único. Em troca, um pagamento
+        # pode ser validado para um horário que acaba em conflito; a validação não tem efeitos.
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                execute_prepared(
+                    cursor, STATEMENTS, "agendamento_insert_finalized",
+                    (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status)
+                )
+                novo_id = cursor.fetchone()[0]
+
+                if montar_notificacao is not None:
+                    inserir_outbox(cursor, [montar_notificacao(novo_id)])
+
+                conn.commit()
+                return novo_id
+
+            except psycopg2.IntegrityError as e:
+                conn.rollback()
+                raise self._erro_de_integridade(e)
+
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+            finally:
+                cursor.close()
+
+    def _erro_de_integridade(self, e):
+        erro_str = str(e)
+
+        if "uk_horario_medico" in erro_str:
+            return AgendamentoError("Médico indisponível neste horário.")
+        if "uk_horario_paciente" in erro_str:
+            return AgendamentoError("Paciente já possui um agendamento neste horário.")
+
+        return AgendamentoError("Dados inválidos (verifique se paciente/médico existem).")
+
+    def create_many(self, agendamentos, montar_notificacao=None):
+        # agendamentos: lista de (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status),
+        # com o status final já validado. Um único INSERT multi-linha e as notificações dos criados
+        # (montar_notificacao(posicao, id)) no outbox, com um só commit; conflitos de horário não
+        # abortam o lote. Retorna uma lista alinhada à entrada com o id criado ou o AgendamentoError do item.
+        if not agendamentos:
+            return []
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
                 query = """
-                    SELECT id, paciente_id, medico_id, data, horario,
-                           especialidade, tipo_pagamento, status
-                    FROM agendamento
-                    WHERE status = %s
-                    ORDER BY data, horario
+                    INSERT INTO agendamento (paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status)
+                    VALUES %s
+                    ON CONFLICT DO NOTHING
+                    RETURNING id, medico_id, data, horario
                 """
-                cursor.execute(query, (status,))
-            else:
-                query = """
-                    SELECT id, paciente_id, medico_id, data, horario,
-                           especialidade, tipo_pagamento, status
-                    FROM agendamento
-                    ORDER BY data, horario
-                """
-                cursor.execute(query)
+                rows = execute_values(cursor, query, agendamentos, page_size=len(agendamentos), fetch=True)
 
-            rows = cursor.fetchall()
+                # (medico_id, data, horario) é único, então identifica a linha de cada item.
+                criados = {(row[1], str(row[2]), row[3]): row[0] for row in rows}
+                chaves = [(int(a[1]), str(a[2]), int(a[3])) for a in agendamentos]
 
-            return [self._row_to_dict(row) for row in rows]
+                # Cada linha criada pertence a um único item; repetições no próprio lote ficam sem id.
+                ids = [criados.pop(chave, None) for chave in chaves]
+                nao_criados = [chave for chave, novo_id in zip(chaves, ids) if novo_id is None]
+                medico_ocupado = set()
 
-        finally:
-            cursor.close()
-            conn.close()
+                if nao_criados:
+                    cursor.execute(
+                        """
+                        SELECT medico_id, data, horario
+                        FROM agendamento
+                        WHERE (medico_id, data, horario) IN %s
+                        """,
+                        (tuple(nao_criados),)
+                    )
+                    medico_ocupado = {(row[0], str(row[1]), row[2]) for row in cursor.fetchall()}
 
-    def list_by_paciente(self, paciente_id, status=None):
-        conn = get_connection()
-        cursor = conn.cursor()
+                if montar_notificacao is not None:
+                    inserir_outbox(cursor, [
+                        montar_notificacao(posicao, novo_id)
+                        for posicao, novo_id in enumerate(ids) if novo_id is not None
+                    ])
 
-        try:
-            if status:
-                query = """
-                    SELECT id, paciente_id, medico_id, data, horario,
+                conn.commit()
+
+                resultados = []
+                for chave, novo_id in zip(chaves, ids):
+                    if novo_id is not None:
+                        resultados.append(novo_id)
+                    elif chave in medico_ocupado:
+                        resultados.append(AgendamentoError("Médico indisponível neste horário."))
+                    else:
+                        resultados.append(AgendamentoError("Paciente já possui um agendamento neste horário."))
+
+                return resultados
+
+            except psycopg2.IntegrityError:
+                conn.rollback()
+                raise AgendamentoError("Dados inválidos (verifique se paciente/médico existem).")
+
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+            finally:
+                cursor.close()
+
+    def get_by_id(self, agendamento_id):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                execute_prepared(cursor, STATEMENTS, "agendamento_get_by_id", (agendamento_id,))
+                row = cursor.fetchone()
+
+                if not row:
+                    return None
+
+                return {
+                    "id": row[0],
+                    "paciente_id": row[1],
+                    "medico_id": row[2],
+                    "data": str(row[3]),
+                    "horario": row[4],
+                    "status": row[5],
+                    "especialidade": row[6]
+                }
+
+            finally:
+                cursor.close()
+
+
+    def list_all(self, status=None, colunar=False):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                execute_prepared(cursor, STATEMENTS, "agendamento_list_all", (status or None,))
+                rows = cursor.fetchall()
+
+                # Formato colunar: as tuplas do cursor, sem montar um dict por linha.
+                if colunar:
+                    return rows
+
+                return [self._row_to_dict(row) for row in rows]
+
+            finally:
+                cursor.close()
+
+    def iter_export(self, status=None, chunk_size=2000):
+        # Exportação em massa: cursor nomeado (server-side), então só um bloco de
+        # chunk_size linhas fica em memória por vez. A conexão fica presa ao gerador até o fim.
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(name=f"export_agendamento_{uuid.uuid4().hex}")
+            cursor.itersize = chunk_size
+
+            try:
+                cursor.execute(
+                    """
+                    SELECT id, paciente_id, medico_id, data::text, horario,
                            especialidade, tipo_pagamento, status
                     FROM agendamento
-                    WHERE paciente_id = %s AND status = %s
-                    ORDER BY data, horario
-                """
-                cursor.execute(query, (paciente_id, status))
-            else:
-                query = """
+                    WHERE (%(status)s::status_agendamento IS NULL OR status = %(status)s)
+                    ORDER BY id
+                    """,
+                    {"status": status or None}
+                )
+
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+
+                    yield rows
+
+            finally:
+                cursor.close()
+
+    def list_by_paciente(self, paciente_id, status=None, colunar=False):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                execute_prepared(cursor, STATEMENTS, "agendamento_list_by_paciente", (paciente_id, status or None))
+                rows = cursor.fetchall()
+
+                # Formato colunar: as tuplas do cursor, sem montar um dict por linha.
+                if colunar:
+                    return rows
+
+                return [self._row_to_dict(row) for row in rows]
+
+            finally:
+                cursor.close()
+
+    def list_by_medico(self, medico_id, status=None, colunar=False):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                execute_prepared(cursor, STATEMENTS, "agendamento_list_by_medico", (medico_id, status or None))
+                rows = cursor.fetchall()
+
+                # Formato colunar: as tuplas do cursor, sem montar um dict por linha.
+                if colunar:
+                    return rows
+
+                return [self._row_to_dict(row) for row in rows]
+
+            finally:
+                cursor.close()
+
+    def list_page(self, paciente_id=None, medico_id=None, status=None, after=None, limit=100):
+        # Paginação keyset em (data, horario, id): cada página é um range scan no índice,
+        # independente da posição na tabela. Retorna (linhas, chave da última linha | None).
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                filtros = []
+                params = []
+
+                if paciente_id is not None:
+                    filtros.append("paciente_id = %s")
+                    params.append(paciente_id)
+
+                if medico_id is not None:
+                    filtros.append("medico_id = %s")
+                    params.append(medico_id)
+
+                if status:
+                    filtros.append("status = %s")
+                    params.append(status)
+
+                if after is not None:
+                    filtros.append("(data, horario, id) > (%s::date, %s, %s)")
+                    params.extend(after)
+
+                where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+
+                query = f"""
                     SELECT id, paciente_id, medico_id, data, horario,
                            especialidade, tipo_pagamento, status
                     FROM agendamento
-                    WHERE paciente_id = %s
-                    ORDER BY data, horario
+                    {where}
+                    ORDER BY data, horario, id
+                    LIMIT %s
                 """
-                cursor.execute(query, (paciente_id,))
+                cursor.execute(query, (*params, limit + 1)) # Uma linha extra indica se há próxima página.
+                rows = cursor.fetchall()
+
+                proxima = None
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    ultima = rows[-1]
+                    proxima = (ultima[3], ultima[4], ultima[0])
 
-            rows = cursor.fetchall()
-            return [self._row_to_dict(row) for row in rows]
+                return [self._row_to_dict(row) for row in rows], proxima
 
-        finally:
-            cursor.close()
-            conn.close()
+            finally:
+                cursor.close()
 
-    def list_by_medico(self, medico_id, status=None):
-        conn = get_connection()
-        cursor = conn.cursor()
+    def list_free_slots(self, medico_ids, data_inicio, data_fim, horario_inicio, horario_fim):
+        # Grade (médico x dia x hora) gerada no banco e confrontada com agendamento via anti-join
+        # no índice uk_horario_medico: uma única query para todo o intervalo. Qualquer linha
+        # existente ocupa o horário, pois a constraint única não considera o status.
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
 
-        try:
-            if status:
+            try:
                 query = """
-                    SELECT id, paciente_id, medico_id, data, horario,
-                           especialidade, tipo_pagamento, status
-                    FROM agendamento
-                    WHERE medico_id = %s AND status = %s
-                    ORDER BY data, horario
+                    SELECT m.medico_id, d.dia::date,
+                           COALESCE(array_agg(h.hora ORDER BY h.hora) FILTER (WHERE a.id IS NULL), '{}')
+                    FROM unnest(%s::bigint[]) AS m(medico_id)
+                    CROSS JOIN generate_series(%s::date, %s::date, interval '1 day') AS d(dia)
+                    CROSS JOIN generate_series(%s, %s) AS h(hora)
+                    LEFT JOIN agendamento a
+                           ON a.medico_id = m.medico_id
+                          AND a.data = d.dia::date
+                          AND a.horario = h.hora
+                    GROUP BY m.medico_id, d.dia
+                    ORDER BY m.medico_id, d.dia
                 """
-                cursor.execute(query, (medico_id, status))
-            else:
-                query = """
-                    SELECT id, paciente_id, medico_id, data, horario,
-                           especialidade, tipo_pagamento, status
+                cursor.execute(query, (list(medico_ids), data_inicio, data_fim, horario_inicio, horario_fim))
+
+                return [
+                    {"medico_id": row[0], "data": str(row[1]), "horarios_livres": list(row[2])}
+                    for row in cursor.fetchall()
+                ]
+
+            finally:
+                cursor.close()
+
+    def list_occupied_slots(self, desde):
+        # Carga do índice de ocupação: só as colunas do horário, a partir de uma data.
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute(
+                    """
+                    SELECT medico_id, paciente_id, data, horario
                     FROM agendamento
-                    WHERE medico_id = %s
-                    ORDER BY data, horario
-                """
-                cursor.execute(query, (medico_id,))
+                    WHERE data >= %s
+                    """,
+                    (desde,)
+                )
+                return cursor.fetchall()
+
+            finally:
+                cursor.close()
 
-            rows = cursor.fetchall()
-            return [self._row_to_dict(row) for row in rows]
+    def count_by_group(self):
+        # Carga inicial das estatísticas: uma varredura agrupada, feita só na subida do serviço.
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
 
-        finally:
-            cursor.close()
-            conn.close()
+            try:
+                cursor.execute(
+                    """
+                    SELECT medico_id, especialidade, data, status, COUNT(*)
+                    FROM agendamento
+                    GROUP BY medico_id, especialidade, data, status
+                    """
+                )
+                return cursor.fetchall()
+
+            finally:
+                cursor.close()
 
     def _row_to_dict(self, row):
         return {
@@ -174,27 +416,30 @@ class AgendamentoRepository:
             "status": row[7]
         }
 
-    def update_status(self, agendamento_id, status):
-        conn = get_connection()
-        cursor = conn.cursor()
+    def update_status(self, agendamento_id, status, notificacao=None, status_anterior=None):
+        # Com status_anterior, só atualiza se o agendamento ainda estiver nele: duas transições
+        # concorrentes (ex.: cancelar e concluir) não passam ambas. Retorna o número de linhas
+        # alteradas; a notificação só vai para o outbox quando a linha mudou.
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                if status_anterior is None:
+                    execute_prepared(cursor, STATEMENTS, "agendamento_update_status", (status, agendamento_id))
+                else:
+                    execute_prepared(cursor, STATEMENTS, "agendamento_update_status_from", (status, agendamento_id, status_anterior))
 
-        try:
-            query = """
-                UPDATE agendamento
-                SET status = %s
-                WHERE id = %s
-            """
-            cursor.execute(query, (status, agendamento_id))
+                alteradas = cursor.rowcount
 
-            if cursor.rowcount == 0:
-                raise AgendamentoError("Agendamento não encontrado.")
+                if alteradas and notificacao is not None:
+                    inserir_outbox(cursor, [notificacao])
 
-            conn.commit()
+                conn.commit()
+                return alteradas
 
-        except psycopg2.Error:
-            conn.rollback()
-            raise AgendamentoError("Erro interno no servidor.")
+            except psycopg2.Error:
+                conn.rollback()
+                raise AgendamentoError("Erro interno no servidor.")
 
-        finally:
-            cursor.close()
-            conn.close()
\ No newline at end of file
+            finally:
+                cursor.close()
@@ -0,0 +1,95 @@
+import psycopg2
+from psycopg2.extras import execute_values
+from src.config import Config
+from src.database.connection import get_pool
+from src.rabbitmq.notification import Notification
+
+def inserir_outbox(cursor, notificacoes):
+    # Chamado dentro da transação que altera o status; o NOTIFY só é entregue no commit.
+    if not notificacoes:
+        return
+
+    execute_values(
+        cursor,
+        """
+        INSERT INTO notificacao_outbox (user_id, agendamento_id, novo_status, mensagem, data, horario)
+        VALUES %s
+        """,
+        [(n.user_id, n.agendamento_id, n.novo_status, n.mensagem, n.data, n.horario) for n in notificacoes]
+    )
+    cursor.execute(f"NOTIFY {Config.OUTBOX_CHANNEL}")
+
+class OutboxRepository:
+    def __init__(self, pool=None):
+        self._pool = pool
+
+    @property
+    def pool(self):
+        return self._pool or get_pool()
+
+    def process_pending(self, limit, publicar):
+        # Trava um lote de notificações pendentes (SKIP LOCKED permite vários relays), chama
+        # publicar(notificacoes) -> [bool] e apaga só as confirmadas pelo broker. As demais
+        # são reagendadas com backoff exponencial: entrega at-least-once.
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute(
+                    """
+                    SELECT id, user_id, agendamento_id, novo_status, mensagem, criado_em, data, horario
+                    FROM notificacao_outbox
+                    WHERE proxima_tentativa <= now()
+                    ORDER BY id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                    """,
+                    (limit,)
+                )
+                rows = cursor.fetchall()
+
+                if not rows:
+                    conn.rollback()
+                    return 0
+
+                notificacoes = [
+                    Notification(
+                        user_id=row[1],
+                        agendamento_id=row[2],
+                        novo_status=row[3],
+                        mensagem=row[4],
+                        timestamp=row[5].isoformat(),
+                        data=row[6].isoformat() if row[6] else None,
+                        horario=row[7]
+                    )
+                    for row in rows
+                ]
+
+                enviados = publicar(notificacoes)
+
+                confirmados = [row[0] for row, ok in zip(rows, enviados) if ok]
+                falhos = [row[0] for row, ok in zip(rows, enviados) if not ok]
+
+                if confirmados:
+                    cursor.execute("DELETE FROM notificacao_outbox WHERE id = ANY(%s)", (confirmados,))
+
+                if falhos:
+                    cursor.execute(
+                        """
+                        UPDATE notificacao_outbox
+                        SET tentativas = tentativas + 1,
+                            proxima_tentativa = now() + LEAST(power(2, tentativas), %s) * interval '1 second'
+                        WHERE id = ANY(%s)
+                        """,
+                        (Config.OUTBOX_MAX_BACKOFF, falhos)
+                    )
+
+                conn.commit()
+                return len(rows)
+
+            except psycopg2.Error:
+                conn.rollback()
+                raise
+
+            finally:
+                cursor.close()
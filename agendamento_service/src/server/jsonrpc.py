@@ -0,0 +1,130 @@
+import inspect
+import json
+import xmlrpc.client
+from xmlrpc.server import resolve_dotted_attribute
+
+try:
+    import msgpack
+except ImportError: # MessagePack é opcional; sem ele só JSON é aceito.
+    msgpack = None
+
+JSONRPC_PATH = "/jsonrpc"
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Erros de protocolo usam os códigos do JSON-RPC 2.0; erros do serviço mantêm os Faults
+# do XML-RPC (1 = erro de negócio, 2 = erro interno).
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+class UnsupportedContentType(Exception):
+    pass
+
+def content_type_of(header):
+    content_type = (header or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+
+    if content_type in MSGPACK_CONTENT_TYPES:
+        if msgpack is None:
+            raise UnsupportedContentType("MessagePack indisponível no servidor.")
+        return content_type
+
+    if content_type != JSON_CONTENT_TYPE:
+        raise UnsupportedContentType(f"Content-Type não suportado: {content_type}")
+
+    return content_type
+
+def loads(body, content_type):
+    if content_type == JSON_CONTENT_TYPE:
+        return json.loads(body)
+    return msgpack.unpackb(body, raw=False)
+
+def dumps(payload, content_type):
+    if content_type == JSON_CONTENT_TYPE:
+        return json.dumps(payload, default=str, ensure_ascii=False).encode()
+    return msgpack.packb(payload, default=str, use_bin_type=True)
+
+def handle_request(dispatcher, body, content_type):
+    # Retorna os bytes da resposta, ou None quando só havia notificações (sem "id").
+    try:
+        payload = loads(body, content_type)
+    except Exception:
+        return dumps(_error(None, PARSE_ERROR, "JSON-RPC inválido."), content_type)
+
+    if isinstance(payload, list):
+        if not payload:
+            return dumps(_error(None, INVALID_REQUEST, "Lote vazio."), content_type)
+
+        # Lote: equivalente ao system.multicall do XML-RPC.
+        responses = [r for r in (_call(dispatcher, request) for request in payload) if r is not None]
+        return dumps(responses, content_type) if responses else None
+
+    response = _call(dispatcher, payload)
+    return dumps(response, content_type) if response is not None else None
+
+def _call(dispatcher, request):
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        return _error(None, INVALID_REQUEST, "Requisição JSON-RPC inválida.")
+
+    request_id = request.get("id")
+    notification = "id" not in request
+    params = request.get("params", [])
+
+    func = _resolve(dispatcher, request["method"])
+    if func is None:
+        response = _error(request_id, METHOD_NOT_FOUND, f"Método não encontrado: {request['method']}")
+
+    elif not isinstance(params, (list, dict)):
+        response = _error(request_id, INVALID_PARAMS, "params deve ser uma lista ou um objeto.")
+
+    else:
+        args, kwargs = (params, {}) if isinstance(params, list) else ([], params)
+
+        try:
+            _bind(func, args, kwargs)
+        except TypeError as e:
+            response = _error(request_id, INVALID_PARAMS, str(e))
+        else:
+            response = _invoke(request_id, func, args, kwargs)
+
+    return None if notification else response
+
+def _invoke(request_id, func, args, kwargs):
+    try:
+        return {"jsonrpc": "2.0", "result": func(*args, **kwargs), "id": request_id}
+
+    except xmlrpc.client.Fault as e:
+        return _error(request_id, e.faultCode, e.faultString)
+
+    except Exception as e:
+        return _error(request_id, 2, f"Erro interno: {e}")
+
+def _bind(func, args, kwargs):
+    # Separa "parâmetros errados" (INVALID_PARAMS) de erros levantados pelo próprio método.
+    try:
+        signature = inspect.signature(func)
+    except ValueError:
+        return # Sem assinatura introspectável: os parâmetros são verificados na chamada.
+
+    signature.bind(*args, **kwargs)
+
+def _resolve(dispatcher, method):
+    # Mesma resolução do SimpleXMLRPCDispatcher: funções registradas, depois a instância.
+    func = dispatcher.funcs.get(method)
+    if func is not None:
+        return func
+
+    if dispatcher.instance is None:
+        return None
+
+    try:
+        func = resolve_dotted_attribute(dispatcher.instance, method, dispatcher.allow_dotted_names)
+    except AttributeError:
+        return None
+
+    return func if callable(func) else None
+
+def _error(request_id, code, message):
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": request_id}
@@ -0,0 +1,403 @@
+import queue
+import selectors
+import socket
+import threading
+import time
+import urllib.parse
+import xmlrpc.client
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+from src.config import Config
+from src.server import jsonrpc
+
+class StreamingGetMixin:
+    # Rotas GET registradas com register_get_route. O corpo é enviado conforme é gerado:
+    # em chunks (Transfer-Encoding) no HTTP/1.1, ou até fechar a conexão no HTTP/1.0.
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+
+        route = self.server.get_routes.get(path)
+        if route is None:
+            self.report_404()
+            return
+
+        try:
+            content_type, body = route(dict(urllib.parse.parse_qsl(query)))
+        except xmlrpc.client.Fault as e:
+            self._send_error_text(400 if e.faultCode == 1 else 500, e.faultString)
+            return
+
+        chunked = self.protocol_version == "HTTP/1.1" and self.request_version == "HTTP/1.1"
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+
+        try:
+            for data in body:
+                if not data:
+                    continue
+
+                if chunked:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                else:
+                    self.wfile.write(data)
+
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+
+        except Exception as e:
+            # O status 200 já foi enviado: a conexão é encerrada sem o chunk final
+            # para o cliente perceber que o corpo ficou incompleto.
+            self.log_error("Envio interrompido em %s: %s", path, e)
+            self.close_connection = True
+
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+
+    def _send_error_text(self, code, message):
+        data = message.encode()
+
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class JSONRPCMixin:
+    # POST /jsonrpc: os mesmos métodos do XML-RPC em JSON-RPC 2.0, com corpo JSON ou
+    # MessagePack (escolhido pelo Content-Type). Demais caminhos seguem para o XML-RPC.
+    def do_POST(self):
+        if self.path.partition("?")[0] != jsonrpc.JSONRPC_PATH:
+            super().do_POST()
+            return
+
+        try:
+            content_type = jsonrpc.content_type_of(self.headers.get("Content-Type"))
+        except jsonrpc.UnsupportedContentType as e:
+            self.close_connection = True # Corpo não lido: a conexão não pode ser reaproveitada.
+            self._send_error_text(415, str(e))
+            return
+
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.close_connection = True
+            self._send_error_text(411, "Content-Length é obrigatório.")
+            return
+
+        body = self.rfile.read(int(length))
+        response = jsonrpc.handle_request(self.server, body, content_type)
+
+        if response is None:
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+class GetRoutesMixin:
+    def __init__(self, *args, **kwargs):
+        self.get_routes = {}
+        super().__init__(*args, **kwargs)
+
+    def register_get_route(self, path, function):
+        # function(params) -> (content_type, iterável de bytes); Fault vira 400/500.
+        self.get_routes[path] = function
+
+class StreamingRequestHandler(JSONRPCMixin, StreamingGetMixin, SimpleXMLRPCRequestHandler):
+    pass
+
+class ThreadedXMLRPCServer(GetRoutesMixin, ThreadingMixIn, SimpleXMLRPCServer):
+    def __init__(self, addr, **kwargs):
+        kwargs.setdefault("requestHandler", StreamingRequestHandler)
+        super().__init__(addr, **kwargs)
+
+class KeepAliveRequestHandler(JSONRPCMixin, StreamingGetMixin, SimpleXMLRPCRequestHandler):
+    # HTTP/1.1: o cliente pode reutilizar a conexão para várias chamadas. Usado pelo
+    # PooledXMLRPCServer, que chama handle_next() uma vez por requisição; entre requisições
+    # a conexão fica no selector do servidor, não em um worker.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    # Limite para ler uma requisição já iniciada; a ociosidade entre requisições é
+    # controlada pelo servidor (RPC_KEEPALIVE_TIMEOUT).
+    timeout = Config.RPC_KEEPALIVE_TIMEOUT
+
+    def __init__(self, request, client_address, server):
+        # Não processa no construtor (como o BaseRequestHandler faz): rfile/wfile vivem
+        # enquanto a conexão estiver aberta.
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.setup()
+
+    def handle_next(self):
+        # Atende uma requisição; retorna True se a conexão continua aberta.
+        self.close_connection = True
+        self.handle_one_request()
+        return not self.close_connection
+
+    def has_buffered_data(self):
+        # Requisição seguinte já recebida (pipelining): lida sem bloquear, com o socket
+        # temporariamente não bloqueante.
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def close(self):
+        try:
+            self.finish()
+        except OSError:
+            pass
+
+class _Conexao:
+    def __init__(self, request, client_address):
+        self.request = request
+        self.client_address = client_address
+        self.handler = None
+        self.ociosa_desde = None
+
+class PooledXMLRPCServer(GetRoutesMixin, SimpleXMLRPCServer):
+    # Número fixo de workers consumindo uma fila de requisições limitada. Com a fila cheia,
+    # novas conexões recebem 503 imediatamente em vez de criar mais threads. Um worker
+    # atende uma requisição por vez: conexões keep-alive ociosas esperam num selector e
+    # voltam à fila só quando o cliente envia a próxima requisição.
+    REJECT_RESPONSE = (
+        b"HTTP/1.1 503 Service Unavailable\r\n"
+        b"Content-Length: 0\r\n"
+        b"Retry-After: 1\r\n"
+        b"Connection: close\r\n\r\n"
+    )
+    REJECT_DRAIN_TIMEOUT = 0.5
+    REJECT_QUEUE_SIZE = 256
+    IDLE_SWEEP_INTERVAL = 1
+
+    def __init__(self, addr, workers, queue_size, keepalive_timeout=Config.RPC_KEEPALIVE_TIMEOUT, **kwargs):
+        kwargs.setdefault("requestHandler", KeepAliveRequestHandler)
+        super().__init__(addr, **kwargs)
+
+        self.workers = workers
+        self.keepalive_timeout = keepalive_timeout
+        # O limite vale só para conexões novas: uma keep-alive que volta do selector já foi
+        # aceita e sempre entra na fila (o total é limitado pelas conexões abertas).
+        self.queue_size = queue_size
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "handled": 0,
+            "busy_workers": 0,
+            "peak_queue_depth": 0,
+            "idle_connections": 0,
+            "idle_closed": 0,
+        }
+
+        self._rejections = queue.Queue(maxsize=self.REJECT_QUEUE_SIZE)
+
+        # Conexões ociosas: os workers as entregam ao selector por _ociosas_novas e acordam
+        # o select com um byte no socketpair (o selector só é usado pela thread dele).
+        self._selector = selectors.DefaultSelector()
+        self._ociosas_novas = queue.SimpleQueue()
+        self._acordar_r, self._acordar_w = socket.socketpair()
+        self._acordar_r.setblocking(False)
+        self._selector.register(self._acordar_r, selectors.EVENT_READ)
+        self._parando = False
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"xmlrpc-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._threads.append(threading.Thread(target=self._rejector, name="xmlrpc-rejector", daemon=True))
+        self._threads.append(threading.Thread(target=self._keepalive_loop, name="xmlrpc-keepalive", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def process_request(self, request, client_address):
+        if self._queue.qsize() >= self.queue_size:
+            self._reject(request)
+            return
+
+        self._queue.put(_Conexao(request, client_address))
+
+        with self._stats_lock:
+            self._stats["accepted"] += 1
+            self._stats["peak_queue_depth"] = max(self._stats["peak_queue_depth"], self._queue.qsize())
+
+    def _reject(self, request):
+        # A resposta 503 é enviada por uma thread própria para não travar o accept.
+        try:
+            self._rejections.put_nowait(request)
+        except queue.Full:
+            self.shutdown_request(request)
+
+        with self._stats_lock:
+            self._stats["rejected"] += 1
+
+    def _rejector(self):
+        while True:
+            request = self._rejections.get()
+            if request is None:
+                return
+
+            try:
+                request.sendall(self.REJECT_RESPONSE)
+
+                # Descarta a requisição já enviada pelo cliente; fechar o socket com dados
+                # não lidos gera um reset e o cliente veria "broken pipe" em vez do 503.
+                deadline = time.monotonic() + self.REJECT_DRAIN_TIMEOUT
+                request.settimeout(self.REJECT_DRAIN_TIMEOUT)
+                while time.monotonic() < deadline and request.recv(65536):
+                    pass
+
+            except OSError:
+                pass
+
+            finally:
+                self.shutdown_request(request)
+
+    def _worker(self):
+        while True:
+            conexao = self._queue.get()
+            if conexao is None:
+                return
+
+            with self._stats_lock:
+                self._stats["busy_workers"] += 1
+
+            manter = False
+            try:
+                if conexao.handler is None:
+                    conexao.handler = self.RequestHandlerClass(conexao.request, conexao.client_address, self)
+                manter = conexao.handler.handle_next()
+            except Exception:
+                self.handle_error(conexao.request, conexao.client_address)
+            finally:
+                if manter and conexao.handler.has_buffered_data():
+                    self._requeue(conexao)
+                elif manter:
+                    self._aguardar(conexao)
+                else:
+                    self._encerrar(conexao)
+
+                with self._stats_lock:
+                    self._stats["busy_workers"] -= 1
+                    self._stats["handled"] += 1
+
+    def _aguardar(self, conexao):
+        # Conexão sem requisição pendente: vai para o selector e libera o worker.
+        conexao.ociosa_desde = time.monotonic()
+        self._ociosas_novas.put(conexao)
+        try:
+            self._acordar_w.send(b"\0")
+        except OSError:
+            pass # Servidor encerrando.
+
+    def _requeue(self, conexao):
+        self._queue.put(conexao)
+
+    def _encerrar(self, conexao):
+        if conexao.handler is not None:
+            conexao.handler.close()
+        self.shutdown_request(conexao.request)
+
+    def _keepalive_loop(self):
+        proxima_varredura = time.monotonic() + self.IDLE_SWEEP_INTERVAL
+
+        while not self._parando:
+            for key, _ in self._selector.select(timeout=self.IDLE_SWEEP_INTERVAL):
+                if key.fileobj is self._acordar_r:
+                    self._registrar_ociosas()
+                    continue
+
+                # Cliente enviou a próxima requisição (ou fechou): de volta à fila de workers.
+                self._selector.unregister(key.fileobj)
+                self._requeue(key.data)
+
+            agora = time.monotonic()
+            if agora >= proxima_varredura:
+                self._encerrar_expiradas(agora)
+                proxima_varredura = agora + self.IDLE_SWEEP_INTERVAL
+
+            with self._stats_lock:
+                self._stats["idle_connections"] = len(self._selector.get_map()) - 1
+
+        for key in list(self._selector.get_map().values()):
+            if key.fileobj is not self._acordar_r:
+                self._encerrar(key.data)
+        self._selector.close()
+
+    def _registrar_ociosas(self):
+        try:
+            while self._acordar_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        while True:
+            try:
+                conexao = self._ociosas_novas.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                self._selector.register(conexao.request, selectors.EVENT_READ, conexao)
+            except (OSError, ValueError):
+                self._encerrar(conexao)
+
+    def _encerrar_expiradas(self, agora):
+        expiradas = [
+            key for key in self._selector.get_map().values()
+            if key.fileobj is not self._acordar_r and agora - key.data.ociosa_desde >= self.keepalive_timeout
+        ]
+
+        for key in expiradas:
+            self._selector.unregister(key.fileobj)
+            self._encerrar(key.data)
+
+        if expiradas:
+            with self._stats_lock:
+                self._stats["idle_closed"] += len(expiradas)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                **self._stats,
+                "queue_depth": self._queue.qsize(),
+                "queue_size": self.queue_size,
+                "workers": self.workers,
+            }
+
+    def server_close(self):
+        super().server_close()
+
+        # Workers terminam a fila atual e depois recebem o sinal de parada.
+        for _ in range(self.workers):
+            self._queue.put(None)
+        self._rejections.put(None)
+        for thread in self._threads[:-1]:
+            thread.join()
+
+        # Por último o selector, que fecha as conexões ociosas restantes.
+        self._parando = True
+        self._acordar_w.send(b"\0")
+        self._threads[-1].join()
+        self._acordar_w.close()
+        self._acordar_r.close()
@@ -1,14 +1,19 @@
 import xmlrpc.client
-from datetime import datetime, time
+from datetime import date, datetime, time
+
+from src.config import Config
+from src.cache.appointment_stats import AppointmentStats
+from src.cache.occupancy_index import OccupancyIndex
+from src.cache.result_cache import ResultCache
 
 from src.integration.users_client import UsersClient
 from src.integration.validation_client import ValidationClient
 
 from src.rabbitmq.notification import Notification
-from src.rabbitmq.publisher import NotificationPublisher
 
-from src.repository.agendamento_repository import AgendamentoRepository, AgendamentoError
+from src.repository.agendamento_repository import COLUNAS, AgendamentoRepository, AgendamentoError
 from src.utils.validators import validar_enum
+from src.utils.pagination import encode_cursor, decode_cursor, validar_limite
 
 class AgendamentoService:
     def __init__(self):
@@ -19,47 +24,62 @@ class AgendamentoService:
         self.ESPECIALIDADES = {'CARDIOLOGIA', 'PEDIATRIA', 'ORTOPEDIA', 'DERMATOLOGIA'}
         self.PAGAMENTOS = {'CONVENIO', 'PARTICULAR'}
         self.STATUS = {'PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO'}
+        self.FORMATOS_RESPOSTA = {'objetos', 'colunar'}
+        self.HORARIO_INICIO = 6 # Primeira consulta do dia (06:00).
+        self.HORARIO_FIM = 16 # Última consulta do dia (16:00 às 17:00).
+
+        self.occupancy_index = OccupancyIndex(self.HORARIO_INICIO, self.HORARIO_FIM)
+        self.result_cache = ResultCache(Config.RESULT_CACHE_MAX_ROWS, Config.RESULT_CACHE_TTL)
+        self.estatisticas = AppointmentStats() # Carregadas pelo main antes de atender requisições.
 
     def agendar_consulta(self, token, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, dados_pagamento):
         if not all([token, paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, dados_pagamento]):
              raise xmlrpc.client.Fault(1, "Todos os campos são obrigatórios.")
 
         try:
-            if not (6 <= horario <= 16):
-                raise xmlrpc.client.Fault(1, "Horário inválido. A clínica funciona das 06:00 às 17:00.")
-            
-            data_hora_agendada = self._data_hora_agendamento(data, horario)
+            self._validar_campos_agendamento(data, horario, especialidade, tipo_pagamento)
 
-            if datetime.now() > data_hora_agendada:
-                raise xmlrpc.client.Fault(1, "Não é possível agendar consultas para datas passadas.")
-            
-            validar_enum(especialidade, self.ESPECIALIDADES, "Especialidade")
-            validar_enum(tipo_pagamento, self.PAGAMENTOS, "Tipo de Pagamento")
+            # As três consultas são independentes: disparadas em paralelo, mas os resultados
+            # são avaliados na mesma ordem de antes para manter a precedência dos erros.
+            requester_future = self.users_client.get_user_role_async(token, token) # token == requisitante_id.
+            paciente_future = self.users_client.get_user_role_async(token, paciente_id)
+            medico_future = self.users_client.get_user_role_async(token, medico_id)
 
-            # Consulta role do requisitante (token == requisitante_id).
-            requester_role = self.users_client.get_user_role(token, token)
+            try:
+                requester_role = requester_future.result()
 
-            if requester_role == "PACIENTE":
-                if int(token) != int(paciente_id):
-                    raise xmlrpc.client.Fault(1, "Paciente só pode agendar consultas para si mesmo.")
-            
-            elif requester_role == "RECEPCIONISTA":
-                pass
-            
-            else:
-                raise xmlrpc.client.Fault(1, "Apenas Pacientes e Recepcionistas podem criar agendamentos.")
+                if requester_role == "PACIENTE":
+                    if int(token) != int(paciente_id):
+                        raise xmlrpc.client.Fault(1, "Paciente só pode agendar consultas para si mesmo.")
+
+                elif requester_role == "RECEPCIONISTA":
+                    pass
+
+                else:
+                    raise xmlrpc.client.Fault(1, "Apenas Pacientes e Recepcionistas podem criar agendamentos.")
+
+                paciente_role = paciente_future.result()
+                if paciente_role != "PACIENTE":
+                    raise xmlrpc.client.Fault(1, f"O ID informado ({paciente_id}) não pertence a um Paciente.")
 
-            paciente_role = self.users_client.get_user_role(token, paciente_id)
-            if paciente_role != "PACIENTE":
-                raise xmlrpc.client.Fault(1, f"O ID informado ({paciente_id}) não pertence a um Paciente.")
+                medico_role = medico_future.result()
+
+            finally:
+                paciente_future.cancel()
+                medico_future.cancel()
 
-            medico_role = self.users_client.get_user_role(token, medico_id)
             if medico_role != "MEDICO":
                 raise xmlrpc.client.Fault(1, f"O ID informado ({medico_id}) não pertence a um Médico.")
 
 
-            agendamento_id = self.agendamento_repository.create(paciente_id, medico_id, data, horario, especialidade, tipo_pagamento)
+            # Pré-checagem em memória: conflitos óbvios não chegam ao banco nem à validação.
+            conflito = self.occupancy_index.conflito(medico_id, paciente_id, data, horario)
+            if conflito == "medico":
+                raise AgendamentoError("Médico indisponível neste horário.")
+            if conflito == "paciente":
+                raise AgendamentoError("Paciente já possui um agendamento neste horário.")
 
+            # Validação antes da transação: ela só contém o INSERT (com o status final) e o outbox.
             status_validacao = self.validation_client.validate_payment(
                 tipo_pagamento,
                 dados_pagamento
@@ -67,8 +87,15 @@ class AgendamentoService:
 
             validar_enum(status_validacao, self.STATUS, "Status")
 
-            self.atualizar_status_e_notificar(paciente_id, agendamento_id, status_validacao, data, horario)
-            
+            agendamento_id = self.agendamento_repository.create_finalized(
+                paciente_id, medico_id, data, horario, especialidade, tipo_pagamento, status_validacao,
+                montar_notificacao=lambda novo_id: self._notificacao(paciente_id, novo_id, status_validacao, data, horario)
+            )
+            self._invalidar_consultas(paciente_id, medico_id)
+            self.estatisticas.record_create(
+                medico_id, especialidade, datetime.fromisoformat(data).date().isoformat(), status_validacao
+            )
+
             return {
                 "id": agendamento_id,
                 "status": status_validacao,
@@ -89,7 +116,179 @@ class AgendamentoService:
             else:
                  raise xmlrpc.client.Fault(1, msg)
             
-    def consultar_agendamentos(self, token, status=None):
+    def agendar_consultas_lote(self, token, agendamentos):
+        # Cada item tem os mesmos campos de agendar_consulta. Falhas de um item não afetam os demais.
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        if not isinstance(agendamentos, list) or not agendamentos:
+            raise xmlrpc.client.Fault(1, "Informe uma lista de agendamentos.")
+
+        if len(agendamentos) > Config.LOTE_MAX_AGENDAMENTOS:
+            raise xmlrpc.client.Fault(1, f"O lote excede o limite de {Config.LOTE_MAX_AGENDAMENTOS} agendamentos.")
+
+        try:
+            requester_role = self.users_client.get_user_role(token, token)
+
+            if requester_role not in {"PACIENTE", "RECEPCIONISTA"}:
+                raise xmlrpc.client.Fault(1, "Apenas Pacientes e Recepcionistas podem criar agendamentos.")
+
+            resultados = [None] * len(agendamentos)
+            validos = []
+
+            for indice, item in enumerate(agendamentos):
+                try:
+                    validos.append((indice, self._validar_item_lote(token, requester_role, item)))
+                except xmlrpc.client.Fault as e:
+                    resultados[indice] = {"indice": indice, "erro": e.faultString}
+
+            # Roles de todos os pacientes/médicos distintos resolvidas em paralelo (e via cache).
+            ids = {item["paciente_id"] for _, item in validos} | {item["medico_id"] for _, item in validos}
+            roles = {user_id: self.users_client.get_user_role_async(token, user_id) for user_id in ids}
+
+            aprovados = []
+            for indice, item in validos:
+                try:
+                    if roles[item["paciente_id"]].result() != "PACIENTE":
+                        raise Exception(f"O ID informado ({item['paciente_id']}) não pertence a um Paciente.")
+
+                    if roles[item["medico_id"]].result() != "MEDICO":
+                        raise Exception(f"O ID informado ({item['medico_id']}) não pertence a um Médico.")
+
+                    aprovados.append((indice, item))
+
+                except Exception as e:
+                    resultados[indice] = {"indice": indice, "erro": str(e)}
+
+            # Validação antes do INSERT: o lote já é inserido com o status final, então uma
+            # falha não deixa linhas PENDENTE ocupando horários.
+            validacoes = self.validation_client.validate_payments([
+                (item["tipo_pagamento"], item["dados_pagamento"]) for _, item in aprovados
+            ]) if aprovados else []
+
+            # Itens com erro na validação falham sozinhos; os demais seguem para o INSERT.
+            validados = []
+            for (indice, item), validacao in zip(aprovados, validacoes):
+                if "erro" in validacao:
+                    resultados[indice] = {"indice": indice, "erro": validacao["erro"]}
+
+                elif validacao.get("status") not in self.STATUS:
+                    resultados[indice] = {"indice": indice, "erro": "Erro interno: status de validação inválido."}
+
+                else:
+                    validados.append((indice, item, validacao["status"]))
+
+            def montar_notificacao(posicao, agendamento_id):
+                _, item, status = validados[posicao]
+                return self._notificacao(item["paciente_id"], agendamento_id, status, item["data"], item["horario"])
+
+            criados = self.agendamento_repository.create_many(
+                [
+                    (item["paciente_id"], item["medico_id"], item["data"], item["horario"], item["especialidade"], item["tipo_pagamento"], status)
+                    for _, item, status in validados
+                ],
+                montar_notificacao
+            )
+
+            inseridos = []
+            for (indice, item, status), criado in zip(validados, criados):
+                if isinstance(criado, AgendamentoError):
+                    resultados[indice] = {"indice": indice, "erro": str(criado)}
+                else:
+                    inseridos.append((indice, item, criado, status))
+
+            for _, item, _, status in inseridos:
+                self._invalidar_consultas(item["paciente_id"], item["medico_id"])
+                self.estatisticas.record_create(item["medico_id"], item["especialidade"], item["data"], status)
+
+            for indice, _, agendamento_id, status in inseridos:
+                resultados[indice] = {
+                    "indice": indice,
+                    "id": agendamento_id,
+                    "status": status,
+                    "mensagem": "Agendamento confirmado." if status == "CONFIRMADO" else "Agendamento rejeitado."
+                }
+
+            return {
+                "resultados": resultados,
+                "sucesso": len(inseridos),
+                "falhas": len(resultados) - len(inseridos)
+            }
+
+        except AgendamentoError as e:
+            raise xmlrpc.client.Fault(1, str(e))
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
+    def consultar_disponibilidade(self, token, medico_ids, data_inicio, data_fim=None):
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        if not medico_ids or not data_inicio:
+            raise xmlrpc.client.Fault(1, "Informe os médicos e a data inicial.")
+
+        try:
+            if not isinstance(medico_ids, list):
+                medico_ids = [medico_ids]
+
+            try:
+                medico_ids = list(dict.fromkeys(int(medico_id) for medico_id in medico_ids))
+                inicio = date.fromisoformat(data_inicio)
+                fim = date.fromisoformat(data_fim) if data_fim else inicio
+            except (TypeError, ValueError):
+                raise xmlrpc.client.Fault(1, "Médicos ou datas inválidos.")
+
+            if fim < inicio:
+                raise xmlrpc.client.Fault(1, "A data final deve ser igual ou posterior à data inicial.")
+
+            if (fim - inicio).days + 1 > Config.DISPONIBILIDADE_MAX_DIAS:
+                raise xmlrpc.client.Fault(1, f"O intervalo máximo é de {Config.DISPONIBILIDADE_MAX_DIAS} dias.")
+
+            if len(medico_ids) > Config.DISPONIBILIDADE_MAX_MEDICOS:
+                raise xmlrpc.client.Fault(1, f"Consulte no máximo {Config.DISPONIBILIDADE_MAX_MEDICOS} médicos por vez.")
+
+            self.users_client.get_user_role(token, token)
+
+            roles = {medico_id: self.users_client.get_user_role_async(token, medico_id) for medico_id in medico_ids}
+            for medico_id, role in roles.items():
+                if role.result() != "MEDICO":
+                    raise xmlrpc.client.Fault(1, f"O ID informado ({medico_id}) não pertence a um Médico.")
+
+            disponibilidade = self.agendamento_repository.list_free_slots(
+                medico_ids,
+                inicio.isoformat(),
+                fim.isoformat(),
+                self.HORARIO_INICIO,
+                self.HORARIO_FIM
+            )
+
+            # Horários que já passaram não podem ser agendados.
+            agora = datetime.now()
+            for dia in disponibilidade:
+                dia["horarios_livres"] = [
+                    horario for horario in dia["horarios_livres"]
+                    if self._data_hora_agendamento(dia["data"], horario) >= agora
+                ]
+
+            return disponibilidade
+
+        except AgendamentoError as e:
+            raise xmlrpc.client.Fault(1, str(e))
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
+    def consultar_agendamentos(self, token, status=None, formato=None):
+        # formato "colunar": {"colunas": [...], "linhas": [[...], ...]} em vez de um struct por agendamento.
         if not token:
             raise xmlrpc.client.Fault(1, "Token é obrigatório.")
 
@@ -97,18 +296,36 @@ class AgendamentoService:
             if status:
                 validar_enum(status, self.STATUS, "Status")
 
+            if formato:
+                validar_enum(formato, self.FORMATOS_RESPOSTA, "Formato")
+
+            colunar = formato == "colunar"
+
             requester_role = self.users_client.get_user_role(token, token)
 
+            # Listas por paciente/médico vêm do cache; escritas invalidam as do usuário afetado.
             if requester_role == "PACIENTE":
-                return self.agendamento_repository.list_by_paciente(paciente_id=token, status=status)
+                agendamentos = self.result_cache.get_or_load(
+                    "paciente", token, (status, colunar),
+                    lambda: self.agendamento_repository.list_by_paciente(paciente_id=token, status=status, colunar=colunar)
+                )
 
-            if requester_role == "MEDICO":
-                return self.agendamento_repository.list_by_medico(medico_id=token, status=status)
+            elif requester_role == "MEDICO":
+                agendamentos = self.result_cache.get_or_load(
+                    "medico", token, (status, colunar),
+                    lambda: self.agendamento_repository.list_by_medico(medico_id=token, status=status, colunar=colunar)
+                )
 
-            if requester_role in {"RECEPCIONISTA", "ADMINISTRADOR"}:
-                return self.agendamento_repository.list_all(status=status)
+            elif requester_role in {"RECEPCIONISTA", "ADMINISTRADOR"}:
+                agendamentos = self.agendamento_repository.list_all(status=status, colunar=colunar)
 
-            raise xmlrpc.client.Fault(1, "permissão negada para consultar agendamentos.")
+            else:
+                raise xmlrpc.client.Fault(1, "permissão negada para consultar agendamentos.")
+
+            if colunar:
+                return {"colunas": list(COLUNAS), "linhas": agendamentos}
+
+            return agendamentos
         
         except AgendamentoError as e:
             raise xmlrpc.client.Fault(1, str(e))
@@ -120,6 +337,53 @@ class AgendamentoService:
             else:
                 raise xmlrpc.client.Fault(1, msg)
     
+    def consultar_agendamentos_paginado(self, token, status=None, cursor=None, limite=None):
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        try:
+            if status:
+                validar_enum(status, self.STATUS, "Status")
+
+            limite = validar_limite(limite)
+            after = decode_cursor(cursor) if cursor else None
+
+            requester_role = self.users_client.get_user_role(token, token)
+
+            if requester_role == "PACIENTE":
+                filtros = {"paciente_id": token}
+
+            elif requester_role == "MEDICO":
+                filtros = {"medico_id": token}
+
+            elif requester_role in {"RECEPCIONISTA", "ADMINISTRADOR"}:
+                filtros = {}
+
+            else:
+                raise xmlrpc.client.Fault(1, "permissão negada para consultar agendamentos.")
+
+            agendamentos, proxima = self.agendamento_repository.list_page(
+                status=status,
+                after=after,
+                limit=limite,
+                **filtros
+            )
+
+            return {
+                "agendamentos": agendamentos,
+                "proximo_cursor": encode_cursor(proxima) if proxima else None
+            }
+
+        except AgendamentoError as e:
+            raise xmlrpc.client.Fault(1, str(e))
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
     def cancelar_agendamento(self, token, agendamento_id):
         if not token:
             raise xmlrpc.client.Fault(1, "Token é obrigatório.")
@@ -147,7 +411,9 @@ class AgendamentoService:
             else:
                 raise xmlrpc.client.Fault(1, "Permissão negada para cancelar agendamentos.")
 
-            self.atualizar_status_e_notificar(agendamento['paciente_id'],agendamento['id'], "CANCELADO", agendamento['data'], agendamento['horario'])
+            # Outra requisição pode ter alterado o status depois do get_by_id.
+            if not self._atualizar_status_e_notificar(agendamento, "CANCELADO"):
+                raise xmlrpc.client.Fault(1, "Apenas agendamentos com status CONFIRMADO podem ser cancelados.")
 
             return {
                 "id": agendamento_id,
@@ -194,7 +460,9 @@ class AgendamentoService:
             if datetime.now() < data_hora_agendada:
                 raise xmlrpc.client.Fault(1, "Não é possível concluir um agendamento antes do horário marcado.")
 
-            self.atualizar_status_e_notificar(agendamento['paciente_id'],agendamento['id'], "CONCLUIDO", agendamento['data'], agendamento['horario'])
+            # Outra requisição pode ter alterado o status depois do get_by_id.
+            if not self._atualizar_status_e_notificar(agendamento, "CONCLUIDO"):
+                raise xmlrpc.client.Fault(1, "Apenas agendamentos com status CONFIRMADO podem ser concluídos.")
 
             return {
                 "id": agendamento_id,
@@ -212,25 +480,142 @@ class AgendamentoService:
             else:
                 raise xmlrpc.client.Fault(1, msg)
             
+    def estatisticas_agendamentos(self, token, data_inicio=None, data_fim=None):
+        # Sem datas, só os totais; com data_inicio (e data_fim opcional), também o detalhe por dia.
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        try:
+            inicio = fim = None
+
+            if data_inicio:
+                try:
+                    inicio = date.fromisoformat(data_inicio)
+                    fim = date.fromisoformat(data_fim) if data_fim else inicio
+                except (TypeError, ValueError):
+                    raise xmlrpc.client.Fault(1, "Datas inválidas.")
+
+                if fim < inicio:
+                    raise xmlrpc.client.Fault(1, "A data final deve ser igual ou posterior à data inicial.")
+
+                if (fim - inicio).days + 1 > Config.ESTATISTICAS_MAX_DIAS:
+                    raise xmlrpc.client.Fault(1, f"O intervalo máximo é de {Config.ESTATISTICAS_MAX_DIAS} dias.")
+
+            requester_role = self.users_client.get_user_role(token, token)
+
+            if requester_role not in {"RECEPCIONISTA", "ADMINISTRADOR"}:
+                raise xmlrpc.client.Fault(1, "Permissão negada para consultar estatísticas.")
+
+            if not self.estatisticas.ready:
+                raise Exception("Erro interno: estatísticas ainda não carregadas.")
+
+            # Contadores em memória: a resposta não depende do tamanho da tabela.
+            return self.estatisticas.snapshot(inicio, fim)
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
+    def invalidar_cache_usuario(self, token, user_id=None):
+        if not token:
+            raise xmlrpc.client.Fault(1, "Token é obrigatório.")
+
+        try:
+            requester_role = self.users_client.get_user_role(token, token)
+
+            if requester_role not in {"RECEPCIONISTA", "ADMINISTRADOR"}:
+                raise xmlrpc.client.Fault(1, "Permissão negada para invalidar o cache de usuários.")
+
+            # Sem user_id, descarta todas as roles em cache.
+            self.users_client.invalidate_user(user_id or None)
+
+            return {"mensagem": "Cache de usuários invalidado com sucesso."}
+
+        except Exception as e:
+            msg = str(e)
+            if "interno" in msg.lower():
+                raise xmlrpc.client.Fault(2, msg)
+            else:
+                raise xmlrpc.client.Fault(1, msg)
+
     # Funções helper.
+    def _validar_campos_agendamento(self, data, horario, especialidade, tipo_pagamento):
+        if not (self.HORARIO_INICIO <= horario <= self.HORARIO_FIM):
+            raise xmlrpc.client.Fault(1, "Horário inválido. A clínica funciona das 06:00 às 17:00.")
+
+        data_hora_agendada = self._data_hora_agendamento(data, horario)
+
+        if datetime.now() > data_hora_agendada:
+            raise xmlrpc.client.Fault(1, "Não é possível agendar consultas para datas passadas.")
+
+        validar_enum(especialidade, self.ESPECIALIDADES, "Especialidade")
+        validar_enum(tipo_pagamento, self.PAGAMENTOS, "Tipo de Pagamento")
+
+    def _validar_item_lote(self, token, requester_role, item):
+        campos = ["paciente_id", "medico_id", "data", "horario", "especialidade", "tipo_pagamento", "dados_pagamento"]
+
+        if not isinstance(item, dict) or not all(item.get(campo) for campo in campos):
+            raise xmlrpc.client.Fault(1, "Todos os campos são obrigatórios.")
+
+        try:
+            item = {
+                **item,
+                "paciente_id": int(item["paciente_id"]),
+                "medico_id": int(item["medico_id"]),
+                "horario": int(item["horario"]),
+                "data": datetime.fromisoformat(item["data"]).date().isoformat()
+            }
+        except (TypeError, ValueError):
+            raise xmlrpc.client.Fault(1, "Dados inválidos no agendamento.")
+
+        self._validar_campos_agendamento(item["data"], item["horario"], item["especialidade"], item["tipo_pagamento"])
+
+        if requester_role == "PACIENTE" and int(token) != item["paciente_id"]:
+            raise xmlrpc.client.Fault(1, "Paciente só pode agendar consultas para si mesmo.")
+
+        return item
+
     def _data_hora_agendamento(self, data, horario):
         return datetime.combine(
             datetime.fromisoformat(data).date(),
             time(hour=horario)
         )
     
-    def atualizar_status_e_notificar(self, paciente_id, agendamento_id, novo_status, data, horario):
-        self.agendamento_repository.update_status(agendamento_id, novo_status)
+    def _atualizar_status_e_notificar(self, agendamento, novo_status):
+        # Privado (prefixo "_"), então não é exposto via XML-RPC/JSON-RPC. A notificação vai
+        # para o outbox na mesma transação; o relay publica em segundo plano. Toda mudança de
+        # status passa por aqui para as listagens em cache e as estatísticas não ficarem
+        # desatualizadas. A transição só vale se o status ainda for o lido (agendamento["status"]);
+        # retorna False quando outra requisição chegou antes.
+        alteradas = self.agendamento_repository.update_status(
+            agendamento["id"],
+            novo_status,
+            self._notificacao(agendamento["paciente_id"], agendamento["id"], novo_status, agendamento["data"], agendamento["horario"]),
+            status_anterior=agendamento["status"]
+        )
 
-        publisher = NotificationPublisher()
-        try:
-            notif_paciente = Notification(
-                user_id=paciente_id,
-                agendamento_id=agendamento_id,
-                novo_status=novo_status,
-                mensagem=f"Sua consulta para o dia {data} às {horario}h teve o status atualizado para {novo_status}"
-            )
-            publisher.publish(notif_paciente)
+        if alteradas != 1:
+            return False
 
-        finally:
-            publisher.close()
\ No newline at end of file
+        self._invalidar_consultas(agendamento["paciente_id"], agendamento["medico_id"])
+        self.estatisticas.record_status_change(
+            agendamento["medico_id"], agendamento["especialidade"], agendamento["data"], agendamento["status"], novo_status
+        )
+        return True
+
+    def _invalidar_consultas(self, paciente_id, medico_id):
+        self.result_cache.invalidate("paciente", paciente_id)
+        self.result_cache.invalidate("medico", medico_id)
+
+    def _notificacao(self, paciente_id, agendamento_id, novo_status, data, horario):
+        return Notification(
+            user_id=paciente_id,
+            agendamento_id=agendamento_id,
+            novo_status=novo_status,
+            mensagem=f"Sua consulta para o dia {data} às {horario}h teve o status atualizado para {novo_status}",
+            data=datetime.fromisoformat(str(data)).date().isoformat(),
+            horario=int(horario)
+        )
@@ -0,0 +1,33 @@
+import base64
+import json
+import xmlrpc.client
+
+from src.config import Config
+
+# Cursor opaco para paginação keyset: codifica a chave (data, horario, id) da última linha entregue.
+def encode_cursor(chave):
+    data, horario, agendamento_id = chave
+    raw = json.dumps([str(data), horario, agendamento_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data, horario, agendamento_id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return str(data), int(horario), int(agendamento_id)
+    except Exception:
+        raise xmlrpc.client.Fault(1, "Cursor de paginação inválido.")
+
+def validar_limite(limite):
+    if limite is None:
+        return Config.PAGE_SIZE_DEFAULT
+
+    try:
+        limite = int(limite)
+    except (TypeError, ValueError):
+        raise xmlrpc.client.Fault(1, "Limite de paginação inválido.")
+
+    if not (1 <= limite <= Config.PAGE_SIZE_MAX):
+        raise xmlrpc.client.Fault(1, f"Limite de paginação deve estar entre 1 e {Config.PAGE_SIZE_MAX}.")
+
+    return limite
@@ -1,14 +1,20 @@
 import xmlrpc.client
 import argparse
+import json
 import os
 import sys
+import time
 
 sys.path.append(os.getcwd())
 
 from utils.session_manager import load_session
 from src.rabbitmq.consumer import NotificationConsumer
+from src.rpc.jsonrpc_client import JSONRPCProxy
+from src.spool.notification_spool import NotificationSpool
 
 RPC_ADDRESS = os.getenv("RPC_ADDRESS")
+RPC_TRANSPORT = os.getenv("RPC_TRANSPORT", "xmlrpc") # "xmlrpc", "jsonrpc" ou "msgpack".
+RECONNECT_DELAY = 5 # Segundos entre tentativas de reconexão do daemon.
 
 def handle_rpc_error(e: xmlrpc.client.Fault):
     print(f"Erro XML-RPC [{e.faultCode}]: {e.faultString}")
@@ -35,11 +41,60 @@ def agendar(server, args):
     except Exception as e:
         print(f"Erro: {e}")
 
+def agendar_lote(server, args):
+    try:
+        session = load_session()
+
+        # Arquivo JSON com uma lista de objetos com os mesmos campos do comando "agendar".
+        with open(args.arquivo, "r") as f:
+            agendamentos = json.load(f)
+
+        response = server.agendar_consultas_lote(session, agendamentos)
+
+        for r in response["resultados"]:
+            if "erro" in r:
+                print(f"Item {r['indice']} | Erro: {r['erro']}")
+            else:
+                print(f"Item {r['indice']} | ID: {r['id']} | Status: {r['status']} | Mensagem: {r['mensagem']}")
+
+        print(f"\n{response['sucesso']} agendamento(s) criado(s), {response['falhas']} falha(s).")
+
+    except xmlrpc.client.Fault as e:
+        handle_rpc_error(e)
+    except Exception as e:
+        print(f"Erro: {e}")
+
+def disponibilidade(server, args):
+    try:
+        session = load_session()
+
+        dias = server.consultar_disponibilidade(session, args.medico_ids, args.inicio, args.fim)
+
+        for d in dias:
+            horarios = ", ".join(f"{h}h" for h in d["horarios_livres"]) or "sem horários livres"
+            print(f"Médico: {d['medico_id']} | Data: {d['data']} | Livres: {horarios}")
+
+    except xmlrpc.client.Fault as e:
+        handle_rpc_error(e)
+    except Exception as e:
+        print(f"Erro: {e}")
+
 def listar(server, args):
     try:
         session = load_session()
 
-        agendamentos = server.consultar_agendamentos(session, args.status)
+        proximo_cursor = None
+
+        if args.limite or args.cursor:
+            pagina = server.consultar_agendamentos_paginado(session, args.status, args.cursor, args.limite)
+            agendamentos = pagina["agendamentos"]
+            proximo_cursor = pagina["proximo_cursor"]
+        elif args.colunar:
+            # Resposta compacta: cabeçalho + listas de valores, convertida de volta em dicts aqui.
+            tabela = server.consultar_agendamentos(session, args.status, "colunar")
+            agendamentos = [dict(zip(tabela["colunas"], linha)) for linha in tabela["linhas"]]
+        else:
+            agendamentos = server.consultar_agendamentos(session, args.status)
 
         if not agendamentos:
             print("Nenhum agendamento encontrado.")
@@ -48,6 +103,32 @@ def listar(server, args):
         for a in agendamentos:
             print(f"ID: {a['id']} | Data: {a['data']} {a['horario']}h | Status: {a['status']} | Médico: {a['medico_id']} | Paciente: {a['paciente_id']}")
 
+        if proximo_cursor:
+            print(f"\nPróxima página: --cursor {proximo_cursor}")
+
+    except xmlrpc.client.Fault as e:
+        handle_rpc_error(e)
+    except Exception as e:
+        print(f"Erro: {e}")
+
+def estatisticas(server, args):
+    try:
+        session = load_session()
+
+        response = server.estatisticas_agendamentos(session, args.inicio, args.fim)
+
+        print(f"Total: {response['total']}")
+        for titulo, chave in [("Status", "por_status"), ("Médico", "por_medico"), ("Especialidade", "por_especialidade"), ("Dia", "por_dia")]:
+            # "por_dia" só vem quando um intervalo (--inicio/--fim) é informado.
+            if chave not in response:
+                continue
+
+            print(f"\nPor {titulo.lower()}:")
+            for nome, valor in sorted(response[chave].items()):
+                if isinstance(valor, dict):
+                    valor = ", ".join(f"{status}: {total}" for status, total in sorted(valor.items()))
+                print(f"{titulo}: {nome} | {valor}")
+
     except xmlrpc.client.Fault as e:
         handle_rpc_error(e)
     except Exception as e:
@@ -79,10 +160,16 @@ def concluir(server, args):
     except Exception as e:
         print(f"Erro: {e}")
 
-def ouvir_notificacoes():
+def ouvir_notificacoes(args):
     session = load_session()
 
     consumer = NotificationConsumer(int(session))
+
+    if args.follow:
+        print("Aguardando notificações (Ctrl+C para sair)...\n")
+        consumer.follow(imprimir_notificacao)
+        return
+
     mensagens = consumer.consume_all()
 
     if not mensagens:
@@ -91,14 +178,75 @@ def ouvir_notificacoes():
 
     print("\nNotificações:\n")
     for n in mensagens:
-        print(
-            f"[{n.timestamp}] "
-            f"Agendamento {n.agendamento_id} → {n.novo_status}\n"
-            f"{n.mensagem}\n"
-        )
+        imprimir_notificacao(n)
+
+def daemon_notificacoes():
+    # Processo de longa duração: uma conexão AMQP aberta, gravando tudo no spool local.
+    # Com o daemon rodando, use "notificacoes" em vez de "ouvir-notificacoes".
+    session = load_session()
+    spool = NotificationSpool()
+
+    print("Daemon de notificações iniciado (Ctrl+C para sair).", flush=True)
+
+    try:
+        while True:
+            try:
+                consumer = NotificationConsumer(int(session))
+                consumer.follow(spool.append, antes_do_ack=spool.commit)
+                return # follow só retorna normalmente no Ctrl+C.
+
+            except Exception as e:
+                print(f"Conexão com o broker perdida ({e}); reconectando...", flush=True)
+                time.sleep(RECONNECT_DELAY)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        spool.commit()
+        spool.close()
+
+def notificacoes(args):
+    # Lê do spool gravado pelo daemon, sem acessar o broker.
+    try:
+        session = load_session()
+        spool = NotificationSpool()
+
+        try:
+            registros = spool.query(
+                int(session),
+                status=args.status,
+                agendamento_id=args.agendamento_id,
+                nao_lidas=args.nao_lidas,
+                limite=args.limite
+            )
+
+            if not registros:
+                print("Nenhuma notificação encontrada.")
+                return
+
+            for _, n in registros:
+                imprimir_notificacao(n)
+
+            spool.mark_read([registro_id for registro_id, _ in registros])
+
+        finally:
+            spool.close()
+
+    except Exception as e:
+        print(f"Erro: {e}")
+
+def imprimir_notificacao(n):
+    print(
+        f"[{n.timestamp}] "
+        f"Agendamento {n.agendamento_id} → {n.novo_status}\n"
+        f"{n.mensagem}\n",
+        flush=True
+    )
 
 def main():
     parser = argparse.ArgumentParser(description="Cliente XML-RPC - Agendamento Service")
+    parser.add_argument("--transporte", choices=["xmlrpc", "jsonrpc", "msgpack"], default=RPC_TRANSPORT)
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     agendar_parser = subparsers.add_parser("agendar")
@@ -119,12 +267,27 @@ def main():
     )
     agendar_parser.add_argument("--dados-pagamento", required=True)
 
+    agendar_lote_parser = subparsers.add_parser("agendar-lote")
+    agendar_lote_parser.add_argument("--arquivo", required=True, help="JSON com a lista de agendamentos")
+
+    disponibilidade_parser = subparsers.add_parser("disponibilidade")
+    disponibilidade_parser.add_argument("--medico-id", type=int, required=True, action="append", dest="medico_ids")
+    disponibilidade_parser.add_argument("--inicio", required=True, help="YYYY-MM-DD")
+    disponibilidade_parser.add_argument("--fim", required=False, help="YYYY-MM-DD (padrão: mesma data de início)")
+
     listar_parser = subparsers.add_parser("listar")
     listar_parser.add_argument(
         "--status", 
         required=False, 
         choices=['PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO']
     )
+    listar_parser.add_argument("--limite", type=int, required=False, help="Agendamentos por página")
+    listar_parser.add_argument("--cursor", required=False, help="Cursor retornado pela página anterior")
+    listar_parser.add_argument("--colunar", action="store_true", help="Pede a resposta no formato colunar (menor)")
+
+    estatisticas_parser = subparsers.add_parser("estatisticas")
+    estatisticas_parser.add_argument("--inicio", required=False, help="YYYY-MM-DD; inclui o detalhe por dia a partir desta data")
+    estatisticas_parser.add_argument("--fim", required=False, help="YYYY-MM-DD (padrão: mesma data de início)")
 
     cancelar_parser = subparsers.add_parser("cancelar")
     cancelar_parser.add_argument("--id", type=int, required=True, dest="agendamento_id")
@@ -132,23 +295,50 @@ def main():
     concluir_parser = subparsers.add_parser("concluir")
     concluir_parser.add_argument("--id", type=int, required=True, dest="agendamento_id")
 
-    subparsers.add_parser("ouvir-notificacoes")
+    ouvir_parser = subparsers.add_parser("ouvir-notificacoes")
+    ouvir_parser.add_argument("--follow", action="store_true", help="Continua recebendo novas notificações")
+
+    subparsers.add_parser("daemon-notificacoes")
+
+    notificacoes_parser = subparsers.add_parser("notificacoes")
+    notificacoes_parser.add_argument(
+        "--status",
+        required=False,
+        choices=['PENDENTE', 'CONFIRMADO', 'REJEITADO', 'CONCLUIDO', 'CANCELADO']
+    )
+    notificacoes_parser.add_argument("--agendamento-id", type=int, required=False)
+    notificacoes_parser.add_argument("--nao-lidas", action="store_true", help="Apenas notificações ainda não exibidas")
+    notificacoes_parser.add_argument("--limite", type=int, required=False)
 
     args = parser.parse_args()
 
-    server = xmlrpc.client.ServerProxy(RPC_ADDRESS, allow_none=True)
+    if args.transporte == "xmlrpc":
+        server = xmlrpc.client.ServerProxy(RPC_ADDRESS, allow_none=True)
+    else:
+        # Mesmos métodos pelo endpoint /jsonrpc, sem XML (corpo JSON ou MessagePack).
+        server = JSONRPCProxy(RPC_ADDRESS.rstrip("/") + "/jsonrpc", use_msgpack=args.transporte == "msgpack")
 
     match args.command:
         case "agendar":
             agendar(server, args)
+        case "agendar-lote":
+            agendar_lote(server, args)
+        case "disponibilidade":
+            disponibilidade(server, args)
         case "listar":
             listar(server, args)
+        case "estatisticas":
+            estatisticas(server, args)
         case "cancelar":
             cancelar(server, args)
         case "concluir":
             concluir(server, args)
         case "ouvir-notificacoes":
-            ouvir_notificacoes()
+            ouvir_notificacoes(args)
+        case "daemon-notificacoes":
+            daemon_notificacoes()
+        case "notificacoes":
+            notificacoes(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,4 +6,11 @@ class Config:
     RABBITMQ_USER = os.getenv("RABBITMQ_USER")
     RABBITMQ_PASSWORD = os.getenv("RABBITMQ_PASSWORD")
 
-    NOTIFICATION_EXCHANGE = "notifications"
\ No newline at end of file
+    NOTIFICATION_EXCHANGE = "notifications"
+    NOTIFICATION_ROUTING = os.getenv("NOTIFICATION_ROUTING", "usuario") # "usuario" (fila por usuário) ou "shard".
+    NOTIFICATION_SHARDS = int(os.getenv("NOTIFICATION_SHARDS", "16")) # Igual ao do agendamento_service.
+    NOTIFICATION_SHARD_MAX_AGE = os.getenv("NOTIFICATION_SHARD_MAX_AGE", "7D")
+
+    NOTIFICATION_PREFETCH = int(os.getenv("NOTIFICATION_PREFETCH", "500")) # Mensagens entregues sem ack pendente.
+    NOTIFICATION_ACK_BATCH = int(os.getenv("NOTIFICATION_ACK_BATCH", "100")) # Ack cumulativo a cada N mensagens...
+    NOTIFICATION_ACK_INTERVAL_MS = int(os.getenv("NOTIFICATION_ACK_INTERVAL_MS", "200")) # ...ou a cada T ms.
\ No newline at end of file
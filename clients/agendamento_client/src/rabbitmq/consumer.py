@@ -1,11 +1,21 @@
+import json
+import os
+import struct
+import sys
+import time
+
+import pika
 from src.rabbitmq.connection import get_connection
 from src.config import Config
 from src.rabbitmq.notification import Notification
+from src.rabbitmq.routing import shard_of, shard_queue, shard_queue_arguments, shard_routing_key, user_queue
+
+OFFSETS_FILE = os.path.expanduser("~/.med_session/stream_offsets.json")
 
 class NotificationConsumer:
     def __init__(self, user_id: int):
         self.user_id = user_id
-        self.queue_name = f"notifications.user.{user_id}"
+        self.sharded = Config.NOTIFICATION_ROUTING == "shard"
 
         self.connection = get_connection()
         self.channel = self.connection.channel()
@@ -16,34 +26,195 @@ class NotificationConsumer:
             durable=True
         )
 
-        self.channel.queue_declare(
+        if self.sharded:
+            # Stream compartilhado pelo shard: lido a partir do último offset deste usuário.
+            shard = shard_of(user_id)
+            self.queue_name = shard_queue(shard)
+            routing_key = shard_routing_key(shard)
+            arguments = shard_queue_arguments()
+        else:
+            self.queue_name = user_queue(user_id)
+            routing_key = str(user_id)
+            arguments = None
+
+        declare = self.channel.queue_declare(
             queue=self.queue_name,
-            durable=True
+            durable=True,
+            arguments=arguments
         )
+        # Mensagens na fila ao conectar; num stream a contagem inclui as de outros usuários.
+        self.pendentes = None if self.sharded else declare.method.message_count
 
         self.channel.queue_bind(
             exchange=Config.NOTIFICATION_EXCHANGE,
             queue=self.queue_name,
-            routing_key=str(user_id)
+            routing_key=routing_key
         )
 
+        # Estado do ack cumulativo (basic_ack com multiple=True).
+        self._ultima_tag = None
+        self._sem_ack = 0
+        self._ultimo_ack = time.monotonic()
+        self._antes_do_ack = None
+        self._proximo_offset = None
+        self.descartadas = 0
+
     def consume_all(self):
+        # Esvazia o que já está na fila e encerra.
         mensagens = []
+        self._consume(mensagens.append, follow=False)
 
-        while True:
-            method, _, body = self.channel.basic_get(
-                queue=self.queue_name,
-                auto_ack=False
-            )
+        self.close()
+        return mensagens
+
+    def follow(self, handler, antes_do_ack=None):
+        # Entrega cada notificação ao handler assim que chega, até Ctrl+C. antes_do_ack é
+        # chamado antes de cada ack cumulativo (ex.: commit do que o handler gravou).
+        self._antes_do_ack = antes_do_ack
+
+        try:
+            self._consume(handler, follow=True)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def _consume(self, handler, follow):
+        # basic_consume com prefetch: o broker empurra as mensagens em vez de um basic_get
+        # (ida e volta) por mensagem, e os acks são agrupados.
+        if self.sharded:
+            self._drenar_fila_legada(handler)
+
+        if not follow and self.pendentes == 0:
+            return
+
+        recebidas = 0
+        intervalo = Config.NOTIFICATION_ACK_INTERVAL_MS / 1000
+
+        def on_message(channel, method, properties, body):
+            nonlocal recebidas
+
+            headers = properties.headers or {}
+
+            # No shard chegam mensagens de vários usuários: só as do próprio vão ao handler.
+            if not self.sharded or headers.get("user_id") == self.user_id:
+                notificacao = self._decodificar(body, properties)
+                if notificacao is not None:
+                    handler(notificacao)
+
+            if self.sharded and "x-stream-offset" in headers:
+                self._proximo_offset = headers["x-stream-offset"] + 1
+
+            recebidas += 1
+            self._ultima_tag = method.delivery_tag
+            self._sem_ack += 1
+
+            if self._sem_ack >= Config.NOTIFICATION_ACK_BATCH:
+                self._flush_acks()
+
+        self.channel.basic_qos(prefetch_count=Config.NOTIFICATION_PREFETCH)
+        consumer_tag = self.channel.basic_consume(
+            queue=self.queue_name,
+            on_message_callback=on_message,
+            auto_ack=False,
+            arguments={"x-stream-offset": self._carregar_offset()} if self.sharded else None
+        )
+
+        try:
+            while follow or self.pendentes is None or recebidas < self.pendentes:
+                antes = recebidas
+                self.connection.process_data_events(time_limit=intervalo)
+
+                if time.monotonic() - self._ultimo_ack >= intervalo:
+                    self._flush_acks()
+
+                # Fila esvaziada antes do esperado (ex.: outro consumidor) ou fim do stream.
+                if not follow and recebidas == antes:
+                    break
+
+        finally:
+            self._flush_acks()
+            if self.channel.is_open:
+                self.channel.basic_cancel(consumer_tag)
+
+    def _flush_acks(self):
+        if self._sem_ack and self.channel.is_open:
+            if self._antes_do_ack is not None:
+                self._antes_do_ack()
+
+            self.channel.basic_ack(self._ultima_tag, multiple=True)
+
+            # Num stream o ack só libera crédito; a posição de leitura fica com o cliente.
+            if self._proximo_offset is not None:
+                self._salvar_offset(self._proximo_offset)
+
+        self._sem_ack = 0
+        self._ultimo_ack = time.monotonic()
+
+    def _drenar_fila_legada(self, handler):
+        # Migração: mensagens que ficaram na fila por usuário de antes do modo "shard".
+        # A fila não é apagada aqui (ver migrate_queues.py no agendamento_service).
+        channel = self.connection.channel()
+
+        try:
+            channel.queue_declare(queue=user_queue(self.user_id), durable=True, passive=True)
+        except pika.exceptions.ChannelClosedByBroker:
+            return # Fila não existe.
 
+        ultima_tag = None
+        while True:
+            method, properties, body = channel.basic_get(queue=user_queue(self.user_id), auto_ack=False)
             if method is None:
                 break
 
-            mensagens.append(Notification.from_json(body.decode()))
-            self.channel.basic_ack(method.delivery_tag)
+            notificacao = self._decodificar(body, properties)
+            if notificacao is not None:
+                handler(notificacao)
+            ultima_tag = method.delivery_tag
 
-        self.close()
-        return mensagens
+        if ultima_tag is not None:
+            if self._antes_do_ack is not None:
+                self._antes_do_ack()
+            channel.basic_ack(ultima_tag, multiple=True)
+
+        channel.close()
+
+    def _decodificar(self, body, properties):
+        # Versão desconhecida ou corpo inválido: a mensagem é registrada e confirmada junto
+        # com as demais. Sem isso ela voltaria a cada reconexão e travaria o consumo.
+        try:
+            return Notification.decode(body, properties.content_type)
+        except (ValueError, KeyError, TypeError, IndexError, struct.error) as e:
+            self.descartadas += 1
+            print(f"Notificação ignorada ({properties.content_type or 'sem content-type'}): {e}", file=sys.stderr, flush=True)
+            return None
+
+    def _offset_key(self):
+        return f"{self.queue_name}:{self.user_id}"
+
+    def _carregar_offset(self):
+        # Primeira leitura do shard: desde o início da retenção do stream.
+        try:
+            with open(OFFSETS_FILE, "r") as f:
+                return json.load(f).get(self._offset_key(), "first")
+        except (OSError, ValueError):
+            return "first"
+
+    def _salvar_offset(self, offset):
+        try:
+            with open(OFFSETS_FILE, "r") as f:
+                offsets = json.load(f)
+        except (OSError, ValueError):
+            offsets = {}
+
+        offsets[self._offset_key()] = offset
+
+        # Escrita atômica: um arquivo truncado faria o próximo run reler o stream inteiro.
+        os.makedirs(os.path.dirname(OFFSETS_FILE), exist_ok=True)
+        temporario = OFFSETS_FILE + ".tmp"
+        with open(temporario, "w") as f:
+            json.dump(offsets, f)
+        os.replace(temporario, OFFSETS_FILE)
 
     def close(self):
         if self.connection.is_open:
@@ -1,25 +1,72 @@
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 import json
+import struct
 
-@dataclass
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_BINARY = "application/vnd.clinica.notificacao"
+
+# Mesmo formato de agendamento_service/src/rabbitmq/notification.py (versão no primeiro byte).
+BINARY_VERSION = 1
+BINARY_V1 = struct.Struct(">BQQBBqiB")
+
+STATUS_CODES = ("PENDENTE", "CONFIRMADO", "REJEITADO", "CONCLUIDO", "CANCELADO")
+ORIGEM_CODES = ("AGENDAMENTO",)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+@dataclass(slots=True)
 class Notification:
     user_id: int
     agendamento_id: int
     novo_status: str
-    mensagem: str
+    mensagem: str = None
     origem: str = "AGENDAMENTO"
     timestamp: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    data: str = None
+    horario: int = None
+
+    def __post_init__(self):
+        # O formato binário não traz o texto: a mensagem é montada aqui com os campos estruturados.
+        if self.mensagem is None:
+            self.mensagem = f"Sua consulta para o dia {self.data} às {self.horario}h teve o status atualizado para {self.novo_status}"
+
+    @staticmethod
+    def decode(body: bytes, content_type: str = None) -> "Notification":
+        # Mensagens sem content_type são do publisher antigo (JSON).
+        if content_type == CONTENT_TYPE_BINARY:
+            return Notification.from_binary(body)
+
+        return Notification.from_json(body.decode())
 
     @staticmethod
     def from_json(body: str) -> "Notification":
         data = json.loads(body)
-        
+
         return Notification(
             user_id=data["user_id"],
             agendamento_id=data["agendamento_id"],
             novo_status=data["novo_status"],
-            mensagem=data["mensagem"],
+            mensagem=data.get("mensagem"),
             origem=data.get("origem", "AGENDAMENTO"),
-            timestamp=data.get("timestamp")
-        )
\ No newline at end of file
+            timestamp=data.get("timestamp"),
+            data=data.get("data"),
+            horario=data.get("horario")
+        )
+
+    @staticmethod
+    def from_binary(body: bytes) -> "Notification":
+        if not body or body[0] != BINARY_VERSION:
+            raise ValueError(f"Versão de notificação não suportada: {body[0] if body else None}")
+
+        _, user_id, agendamento_id, status, origem, instante, dia, horario = BINARY_V1.unpack(body)
+
+        return Notification(
+            user_id=user_id,
+            agendamento_id=agendamento_id,
+            novo_status=STATUS_CODES[status],
+            origem=ORIGEM_CODES[origem],
+            timestamp=(EPOCH + timedelta(microseconds=instante)).isoformat(),
+            data=date.fromordinal(dia).isoformat(),
+            horario=horario
+        )
@@ -0,0 +1,21 @@
+import zlib
+
+from src.config import Config
+
+# Mesmo cálculo de agendamento_service/src/rabbitmq/routing.py: os dois lados precisam
+# concordar sobre o shard de cada usuário.
+
+def shard_of(user_id, shards=None):
+    return zlib.crc32(str(int(user_id)).encode()) % (shards or Config.NOTIFICATION_SHARDS)
+
+def user_queue(user_id):
+    return f"notifications.user.{user_id}"
+
+def shard_queue(shard):
+    return f"notifications.shard.{shard}"
+
+def shard_routing_key(shard):
+    return f"shard.{shard}"
+
+def shard_queue_arguments():
+    return {"x-queue-type": "stream", "x-max-age": Config.NOTIFICATION_SHARD_MAX_AGE}
@@ -0,0 +1,95 @@
+import http.client
+import itertools
+import json
+import urllib.parse
+import xmlrpc.client
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class _Method:
+    # Permite nomes com ponto (ex.: proxy.system.multicall), como no ServerProxy.
+    def __init__(self, proxy, name):
+        self._proxy = proxy
+        self._name = name
+
+    def __getattr__(self, name):
+        return _Method(self._proxy, f"{self._name}.{name}")
+
+    def __call__(self, *args):
+        return self._proxy._call(self._name, list(args))
+
+class JSONRPCProxy:
+    # Contraparte do xmlrpc.client.ServerProxy para o endpoint /jsonrpc do agendamento_service.
+    # Erros voltam como xmlrpc.client.Fault com os mesmos códigos (1 = negócio, 2 = interno),
+    # então o código que trata Faults funciona com os dois transportes. A conexão HTTP é
+    # reaproveitada entre chamadas (não compartilhar o proxy entre threads).
+    def __init__(self, url, use_msgpack=False):
+        if use_msgpack and msgpack is None:
+            raise RuntimeError("Instale o pacote msgpack para usar o transporte MessagePack.")
+
+        parsed = urllib.parse.urlsplit(url)
+        self._host = parsed.hostname
+        self._port = parsed.port or 80
+        self._path = parsed.path or "/jsonrpc"
+
+        self._content_type = "application/msgpack" if use_msgpack else "application/json"
+        self._ids = itertools.count(1)
+        self._conn = None
+
+    def __getattr__(self, name):
+        return _Method(self, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _call(self, method, params):
+        request_id = next(self._ids)
+        response = self._post({"jsonrpc": "2.0", "method": method, "params": params, "id": request_id})
+
+        if "error" in response:
+            raise xmlrpc.client.Fault(response["error"]["code"], response["error"]["message"])
+
+        return response["result"]
+
+    def _post(self, payload):
+        body = self._dumps(payload)
+        headers = {"Content-Type": self._content_type, "Accept": self._content_type}
+
+        # Uma nova tentativa se o servidor fechou a conexão keep-alive ociosa.
+        for tentativa in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self._host, self._port)
+
+            try:
+                self._conn.request("POST", self._path, body, headers)
+                response = self._conn.getresponse()
+                data = response.read()
+                break
+
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if tentativa == 1:
+                    raise
+
+        if response.will_close:
+            self.close()
+
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(self._path, response.status, data.decode(errors="replace"), dict(response.getheaders()))
+
+        return self._loads(data)
+
+    def _dumps(self, payload):
+        if msgpack is not None and self._content_type == "application/msgpack":
+            return msgpack.packb(payload, use_bin_type=True)
+        return json.dumps(payload).encode()
+
+    def _loads(self, data):
+        if msgpack is not None and self._content_type == "application/msgpack":
+            return msgpack.unpackb(data, raw=False)
+        return json.loads(data)
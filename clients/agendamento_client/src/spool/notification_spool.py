@@ -0,0 +1,113 @@
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from src.rabbitmq.notification import Notification
+
+SPOOL_FILE = os.path.expanduser("~/.med_session/notificacoes.db")
+
+class NotificationSpool:
+    # Notificações recebidas pelo daemon, gravadas em SQLite (WAL) para o CLI consultar
+    # sem falar com o broker. Reentregas do RabbitMQ são ignoradas pela chave única.
+    def __init__(self, path=SPOOL_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL") # Leitores não bloqueiam o daemon.
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS notificacao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                agendamento_id INTEGER NOT NULL,
+                novo_status TEXT NOT NULL,
+                mensagem TEXT NOT NULL,
+                origem TEXT NOT NULL,
+                timestamp TEXT,
+                recebida_em TEXT NOT NULL,
+                lida INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (user_id, agendamento_id, novo_status, timestamp)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_notificacao_user ON notificacao (user_id, id);
+            CREATE INDEX IF NOT EXISTS idx_notificacao_status ON notificacao (user_id, novo_status, id);
+            CREATE INDEX IF NOT EXISTS idx_notificacao_agendamento ON notificacao (user_id, agendamento_id, id);
+            CREATE INDEX IF NOT EXISTS idx_notificacao_nao_lida ON notificacao (user_id, id) WHERE lida = 0;
+            """
+        )
+        self.conn.commit()
+
+    def append(self, notification):
+        # Sem commit: o daemon chama commit() antes de cada ack cumulativo.
+        self.conn.execute(
+            """
+            INSERT OR IGNORE INTO notificacao
+                (user_id, agendamento_id, novo_status, mensagem, origem, timestamp, recebida_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                notification.user_id,
+                notification.agendamento_id,
+                notification.novo_status,
+                notification.mensagem,
+                notification.origem,
+                notification.timestamp,
+                datetime.now(timezone.utc).isoformat()
+            )
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def query(self, user_id, status=None, agendamento_id=None, nao_lidas=False, limite=None):
+        # Mais recentes primeiro.
+        filtros = ["user_id = ?"]
+        params = [user_id]
+
+        if status:
+            filtros.append("novo_status = ?")
+            params.append(status)
+
+        if agendamento_id:
+            filtros.append("agendamento_id = ?")
+            params.append(agendamento_id)
+
+        if nao_lidas:
+            filtros.append("lida = 0")
+
+        sql = f"""
+            SELECT id, user_id, agendamento_id, novo_status, mensagem, origem, timestamp
+            FROM notificacao
+            WHERE {" AND ".join(filtros)}
+            ORDER BY id DESC
+        """
+
+        if limite:
+            sql += " LIMIT ?"
+            params.append(limite)
+
+        rows = self.conn.execute(sql, params).fetchall()
+
+        return [
+            (
+                row[0],
+                Notification(
+                    user_id=row[1],
+                    agendamento_id=row[2],
+                    novo_status=row[3],
+                    mensagem=row[4],
+                    origem=row[5],
+                    timestamp=row[6]
+                )
+            )
+            for row in rows
+        ]
+
+    def mark_read(self, ids):
+        self.conn.executemany("UPDATE notificacao SET lida = 1 WHERE id = ?", [(i,) for i in ids])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -30,6 +30,54 @@ CREATE TABLE agendamento (
   CONSTRAINT chk_horario_valido CHECK (horario >= 6 AND horario <= 16) -- Horário de funcionamento das 6:00 às 17:00.
 );
 
+-- Eventos de ocupação de horário para o índice em memória do agendamento_service.
+-- Só dispara quando o horário muda (INSERT/DELETE ou UPDATE das colunas do horário);
+-- o NOTIFY é entregue apenas no commit.
+CREATE FUNCTION notificar_ocupacao() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    PERFORM pg_notify('agendamento_ocupacao', json_build_object(
+      'op', 'D', 'medico_id', OLD.medico_id, 'paciente_id', OLD.paciente_id, 'data', OLD.data, 'horario', OLD.horario
+    )::text);
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM pg_notify('agendamento_ocupacao', json_build_object(
+      'op', 'I', 'medico_id', NEW.medico_id, 'paciente_id', NEW.paciente_id, 'data', NEW.data, 'horario', NEW.horario
+    )::text);
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_agendamento_ocupacao
+AFTER INSERT OR DELETE OR UPDATE OF medico_id, paciente_id, data, horario ON agendamento
+FOR EACH ROW EXECUTE FUNCTION notificar_ocupacao();
+
+-- Outbox transacional: notificações gravadas na mesma transação da mudança de status
+-- e publicadas no RabbitMQ pelo relay do agendamento_service.
+CREATE TABLE notificacao_outbox (
+  id BIGSERIAL PRIMARY KEY,
+  user_id BIGINT NOT NULL,
+  agendamento_id BIGINT NOT NULL,
+  novo_status status_agendamento NOT NULL,
+  mensagem TEXT NOT NULL,
+  data DATE, -- Campos estruturados para o formato binário (o consumidor monta a mensagem).
+  horario INT,
+  criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+  tentativas INT NOT NULL DEFAULT 0,
+  proxima_tentativa TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_outbox_proxima_tentativa ON notificacao_outbox (proxima_tentativa, id);
+
+-- Índices para paginação keyset em (data, horario, id): cada página vira um range scan.
+CREATE INDEX idx_agendamento_data_horario_id ON agendamento (data, horario, id);
+CREATE INDEX idx_agendamento_status_data_horario_id ON agendamento (status, data, horario, id);
+CREATE INDEX idx_agendamento_paciente_data_horario_id ON agendamento (paciente_id, data, horario, id);
+CREATE INDEX idx_agendamento_medico_data_horario_id ON agendamento (medico_id, data, horario, id);
+
 -- Sistema sempre deve iniciar com uma conta ADM
 -- Senha "123" hasheada com Bcrypt custo 12.
 INSERT INTO usuario (nome, email, senha, tipo) VALUES 
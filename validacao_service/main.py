@@ -1,5 +1,11 @@
+from src.config import Config
+from src.server.async_validation_server import AsyncValidationServer
 from src.server.validation_server import ValidationServer
 
 if __name__ == "__main__":
-    server = ValidationServer()
-    server.start()
\ No newline at end of file
+    if Config.SERVER_MODE == "asyncio":
+        server = AsyncValidationServer()
+    else:
+        server = ValidationServer()
+
+    server.start()
@@ -3,4 +3,10 @@ import os
 class Config:
     VALIDATION_HOST = "0.0.0.0"
     VALIDATION_PORT = int(os.getenv("VALIDATION_PORT"))
-    BUFFER_SIZE = 4096
\ No newline at end of file
+    BUFFER_SIZE = 4096
+    MAX_BATCH_SIZE = int(os.getenv("VALIDATION_MAX_BATCH_SIZE", "10000"))
+
+    SERVER_MODE = os.getenv("VALIDATION_SERVER_MODE", "thread") # "thread" ou "asyncio".
+    MAX_CONNECTIONS = int(os.getenv("VALIDATION_MAX_CONNECTIONS", "1000")) # Apenas no modo asyncio.
+    READ_TIMEOUT = float(os.getenv("VALIDATION_READ_TIMEOUT", "60")) # Segundos; inclui conexões keep-alive ociosas.
+    SHUTDOWN_TIMEOUT = float(os.getenv("VALIDATION_SHUTDOWN_TIMEOUT", "10"))
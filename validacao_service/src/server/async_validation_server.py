@@ -0,0 +1,115 @@
+import asyncio
+import json
+import signal
+
+from src.config import Config
+from src.server.protocol import HEADER, ProtocolError, decode_header, encode_frame, is_legacy
+from src.server.validation_server import ValidationServer
+
+class AsyncValidationServer(ValidationServer):
+    # Mesmo protocolo do ValidationServer, mas todas as conexões são atendidas por um único
+    # event loop em vez de uma thread por conexão.
+    def __init__(self):
+        super().__init__()
+        self._connections = {} # task -> True enquanto processa uma requisição.
+        self._closing = False
+
+    def start(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        server = await asyncio.start_server(
+            self.handle_client,
+            Config.VALIDATION_HOST,
+            Config.VALIDATION_PORT,
+            reuse_address=True
+        )
+
+        async with server:
+            await stop.wait()
+
+            # Encerramento gracioso: para de aceitar conexões, fecha as ociosas
+            # e dá um prazo para as requisições em andamento terminarem.
+            self._closing = True
+            server.close()
+
+            for task, busy in list(self._connections.items()):
+                if not busy:
+                    task.cancel()
+
+            if self._connections:
+                _, pending = await asyncio.wait(list(self._connections), timeout=Config.SHUTDOWN_TIMEOUT)
+                for task in pending:
+                    task.cancel()
+
+    async def handle_client(self, reader, writer):
+        task = asyncio.current_task()
+
+        if self._closing or len(self._connections) >= Config.MAX_CONNECTIONS:
+            writer.close()
+            return
+
+        self._connections[task] = False
+        try:
+            await self.handle_connection_async(reader, writer, task)
+
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError, ProtocolError):
+            pass
+
+        finally:
+            del self._connections[task]
+            writer.close()
+
+    async def handle_connection_async(self, reader, writer, task):
+        header = await self._read(reader.readexactly(HEADER.size))
+
+        if is_legacy(header):
+            await self.handle_legacy_request_async(reader, writer, header)
+            return
+
+        while True:
+            self._connections[task] = True
+            body = await self._read(reader.readexactly(decode_header(header)))
+
+            writer.write(encode_frame(self.handle_message(body)))
+            await writer.drain()
+            self._connections[task] = False
+
+            if self._closing:
+                return
+
+            try:
+                header = await self._read(reader.readexactly(HEADER.size))
+            except asyncio.IncompleteReadError as e:
+                if not e.partial:
+                    return # Cliente encerrou a conexão entre frames.
+                raise
+
+    async def handle_legacy_request_async(self, reader, writer, data):
+        payload = None
+
+        while payload is None:
+            try:
+                payload = json.loads(data.decode())
+            except ValueError:
+                chunk = await self._read(reader.read(Config.BUFFER_SIZE))
+                if not chunk:
+                    break
+                data += chunk
+
+        if payload is None:
+            response = {"erro": "erro interno no servidor"}
+        else:
+            response = self.process(payload)
+
+        writer.write(json.dumps(response).encode())
+        await writer.drain()
+
+    async def _read(self, operation):
+        return await asyncio.wait_for(operation, Config.READ_TIMEOUT)
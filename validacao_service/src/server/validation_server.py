@@ -3,13 +3,14 @@ import json
 import threading
 
 from src.config import Config
+from src.server.protocol import HEADER, ProtocolError, decode_body, decode_header, encode_frame, is_legacy, recv_exact
 from src.validation.payment_validator import PaymentValidator
 
 class ValidationServer:
 
     def __init__(self):
         self.validator = PaymentValidator()
-        
+
     def start(self):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
             server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -23,16 +24,47 @@ class ValidationServer:
 
     def handle_connection(self, conn):
         with conn:
-            self.handle_request(conn)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            try:
+                header = recv_exact(conn, HEADER.size)
+                if header is None:
+                    return
+
+                if is_legacy(header):
+                    self.handle_legacy_request(conn, header)
+                    return
+
+                # Conexão keep-alive: atende frames até o cliente encerrar.
+                while header is not None:
+                    body = recv_exact(conn, decode_header(header))
+                    if body is None:
+                        raise ProtocolError("Conexão encerrada no meio de um frame.")
+
+                    conn.sendall(encode_frame(self.handle_message(body)))
+                    header = recv_exact(conn, HEADER.size)
 
-    def handle_request(self, conn):
+            except (OSError, ProtocolError):
+                pass
+
+    def handle_message(self, body):
         try:
-            data = conn.recv(Config.BUFFER_SIZE)
-            if not data:
-                return
-            
-            payload = json.loads(data.decode())
+            payload = decode_body(body)
+        except Exception:
+            return {"erro": "erro interno no servidor"}
+
+        response = self.process(payload)
+
+        if isinstance(payload, dict) and "id" in payload:
+            response["id"] = payload["id"]
+
+        return response
 
+    def process(self, payload):
+        if isinstance(payload, dict) and "pagamentos" in payload:
+            return self.process_batch(payload)
+
+        try:
             tipo_pagamento = payload["tipo_pagamento"]
             dados_pagamento = payload["dados_pagamento"]
 
@@ -41,9 +73,38 @@ class ValidationServer:
                 dados_pagamento
             )
 
-            response = {"status": status}
+            return {"status": status}
 
         except Exception as e:
+            return {"erro": "erro interno no servidor"}
+
+    def process_batch(self, payload):
+        pagamentos = payload["pagamentos"]
+
+        if not isinstance(pagamentos, list):
+            return {"erro": "lote de pagamentos inválido"}
+
+        if len(pagamentos) > Config.MAX_BATCH_SIZE:
+            return {"erro": f"lote excede o limite de {Config.MAX_BATCH_SIZE} pagamentos"}
+
+        return {"resultados": self.validator.validate_batch(pagamentos)}
+
+    def handle_legacy_request(self, conn, data):
+        # Formato antigo: um JSON cru por conexão, sem framing. Lê até o JSON ficar completo.
+        payload = None
+
+        while payload is None:
+            try:
+                payload = json.loads(data.decode())
+            except ValueError:
+                chunk = conn.recv(Config.BUFFER_SIZE)
+                if not chunk:
+                    break
+                data += chunk
+
+        if payload is None:
             response = {"erro": "erro interno no servidor"}
+        else:
+            response = self.process(payload)
 
-        conn.sendall(json.dumps(response).encode())
\ No newline at end of file
+        conn.sendall(json.dumps(response).encode())
@@ -1,5 +1,18 @@
 class PaymentValidator:
 
+    def validate_batch(self, pagamentos):
+        # Resultados na mesma ordem do lote; um item malformado não invalida os demais.
+        resultados = []
+
+        for pagamento in pagamentos:
+            try:
+                status = self.validate(pagamento["tipo_pagamento"], pagamento["dados_pagamento"])
+                resultados.append({"status": status})
+            except Exception:
+                resultados.append({"erro": "pagamento malformado"})
+
+        return resultados
+
     def validate(self, tipo_pagamento, dados_pagamento):
         tipo_pagamento = str(tipo_pagamento).upper()
 